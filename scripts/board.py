@@ -0,0 +1,329 @@
+import math
+import reader
+import polygon
+import placement
+
+# board placement with a selectable level of detail for the copper
+#
+#   point   a point at the center of each pad or hole
+#   circle  a cylinder of the pad's inscribed circle, fast and good enough for
+#           enclosure fit checks
+#   box     a box of the pad's full size
+#   brep    the exact rounded rectangle, ring or polygon as a closed brep
+#   mesh    the outline as a closed mesh with the arcs split into segments,
+#           for export; polygons are triangulated by polygon.Triangulate
+#
+# every level puts top copper between z = 0 and 0.1 and bottom copper just
+# under the board, on the "top copper" and "bottom copper" layers, so fit
+# checks and renders agree on where the copper is.  only eagle layers 1 (top)
+# and 16 (bottom) are copper; anything else is not placed.  objects are added
+# with RhinoCommon directly, without the temporary curves and surfaces of the
+# rhinoscriptsyntax construction.
+
+FIDELITIES = ["point", "circle", "box", "brep", "mesh"]
+
+COPPER = 0.1
+
+LAYERS = {
+    1: ("top copper", (255, 0, 0)),
+    16: ("bottom copper", (0, 0, 255)),
+}
+BOARD = ("board", (20, 150, 20))
+PACKAGES = ("packages", None)
+
+# segments of a full circle for mesh outlines
+SEGMENTS = 24
+
+# corners of a w x h rectangle centered at x, y with corner radius f, counter
+# clockwise; the arcs are split into segments
+def RoundedRectangle(x, y, w, h, f, segments=SEGMENTS):
+    f = min(f, w / 2.0, h / 2.0)
+    if f <= 0:
+        return [(x - w / 2.0, y - h / 2.0), (x + w / 2.0, y - h / 2.0), (x + w / 2.0, y + h / 2.0), (x - w / 2.0, y + h / 2.0)]
+    points = []
+    steps = max(segments // 4, 1)
+    corners = [(x + w / 2.0 - f, y - h / 2.0 + f, -90), (x + w / 2.0 - f, y + h / 2.0 - f, 0), (x - w / 2.0 + f, y + h / 2.0 - f, 90), (x - w / 2.0 + f, y - h / 2.0 + f, 180)]
+    for cx, cy, start in corners:
+        for i in range(steps + 1):
+            a = math.radians(start + 90.0 * i / steps)
+            p = (cx + f * math.cos(a), cy + f * math.sin(a))
+            # fully rounded sides meet in one point, keep it once
+            if not points or abs(p[0] - points[-1][0]) + abs(p[1] - points[-1][1]) > 1e-9:
+                points.append(p)
+    if abs(points[0][0] - points[-1][0]) + abs(points[0][1] - points[-1][1]) <= 1e-9:
+        points.pop()
+    return points
+
+# the same rounded rectangle as corner records with arcs, see Profile
+def RoundedCorners(x, y, w, h, f):
+    f = min(f, w / 2.0, h / 2.0)
+    if f <= 0:
+        return RoundedRectangle(x, y, w, h, f)
+    records = []
+    corners = [(x + w / 2.0 - f, y - h / 2.0 + f, -90), (x + w / 2.0 - f, y + h / 2.0 - f, 0), (x - w / 2.0 + f, y + h / 2.0 - f, 90), (x - w / 2.0 + f, y - h / 2.0 + f, 180)]
+    for cx, cy, start in corners:
+        a, m, b = [(cx + f * math.cos(math.radians(start + d)), cy + f * math.sin(math.radians(start + d))) for d in [0, 45, 90]]
+        records.append((a[0], a[1], 0, b[0], b[1], 0, m[0], m[1], 0))
+    return records
+
+def Circle(x, y, radius, segments=SEGMENTS):
+    return [(x + radius * math.cos(2 * math.pi * i / segments), y + radius * math.sin(2 * math.pi * i / segments)) for i in range(segments)]
+
+# closed mesh of a convex outline extruded from z0 to z1
+def Prism(outline, z0, z1):
+    import Rhino
+    mesh = Rhino.Geometry.Mesh()
+    n = len(outline)
+    for x, y in outline:
+        mesh.Vertices.Add(x, y, z0)
+    for x, y in outline:
+        mesh.Vertices.Add(x, y, z1)
+    for i in range(1, n - 1):
+        mesh.Faces.AddFace(0, i + 1, i)
+        mesh.Faces.AddFace(n, n + i, n + i + 1)
+    for i in range(n):
+        j = (i + 1) % n
+        mesh.Faces.AddFace(i, j, n + j, n + i)
+    mesh.Normals.ComputeNormals()
+    mesh.Compact()
+    return mesh
+
+# closed mesh of the ring between two concentric circles
+def RingMesh(x, y, r0, r1, z0, z1, segments=SEGMENTS):
+    import Rhino
+    mesh = Rhino.Geometry.Mesh()
+    inner = Circle(x, y, min(r0, r1), segments)
+    outer = Circle(x, y, max(r0, r1), segments)
+    # vertices: inner bottom, outer bottom, inner top, outer top
+    for ring, z in [(inner, z0), (outer, z0), (inner, z1), (outer, z1)]:
+        for px, py in ring:
+            mesh.Vertices.Add(px, py, z)
+    n = segments
+    for i in range(n):
+        j = (i + 1) % n
+        mesh.Faces.AddFace(i, j, n + j, n + i)
+        mesh.Faces.AddFace(2 * n + i, 3 * n + i, 3 * n + j, 2 * n + j)
+        mesh.Faces.AddFace(n + i, n + j, 3 * n + j, 3 * n + i)
+        mesh.Faces.AddFace(i, 2 * n + i, 2 * n + j, j)
+    mesh.Normals.ComputeNormals()
+    mesh.Compact()
+    return mesh
+
+def Box(x0, y0, x1, y1, z0, z1):
+    import Rhino
+    box = Rhino.Geometry.BoundingBox(x0, y0, z0, x1, y1, z1)
+    return Rhino.Geometry.Brep.CreateFromBox(box)
+
+# closed brep of a planar closed curve at z0 extruded up to z1
+def Extrude(curve, z0, z1):
+    import Rhino
+    import scriptcontext as sc
+    brep = Rhino.Geometry.Surface.CreateExtrusion(curve, Rhino.Geometry.Vector3d(0, 0, z1 - z0)).ToBrep()
+    return brep.CapPlanarHoles(sc.doc.ModelAbsoluteTolerance) or brep
+
+# rhino transform of a 4x4 placement matrix
+def Xform(matrix):
+    import Rhino
+    xform = Rhino.Geometry.Transform(1.0)
+    for i in range(4):
+        for j in range(4):
+            xform[i, j] = float(matrix[i][j])
+    return xform
+
+# closed curve at z of corner records with lines and arcs
+def Profile(points, z):
+    import Rhino
+    curve = Rhino.Geometry.PolyCurve()
+    first = None
+    current = None
+    for point in points:
+        p = Rhino.Geometry.Point3d(point[0], point[1], z)
+        if first is None:
+            first = p
+        elif p.DistanceTo(current) > 1e-9:
+            curve.Append(Rhino.Geometry.Line(current, p))
+        current = p
+        if len(point) >= 9:
+            end = Rhino.Geometry.Point3d(point[3], point[4], z)
+            curve.Append(Rhino.Geometry.Arc(current, Rhino.Geometry.Point3d(point[6], point[7], z), end))
+            current = end
+    if current.DistanceTo(first) > 1e-9:
+        curve.Append(Rhino.Geometry.Line(current, first))
+    return curve
+
+class Board:
+
+    def __init__(self, library, thickness=1.6, fidelity="circle"):
+        if fidelity not in FIDELITIES:
+            raise ValueError("unknown fidelity " + fidelity)
+        self.library = library
+        self.thickness = thickness
+        self.fidelity = fidelity
+        self.attributes = {}
+
+    # attributes for objects on a layer; the layer is created with a material
+    # once, objects take their color and material from it
+    def Attributes(self, layer, color):
+        attributes = self.attributes.get(layer)
+        if attributes is None:
+            import rhinoscriptsyntax as rs
+            if not rs.IsLayer(layer):
+                rs.AddLayer(layer, color)
+                if color is not None:
+                    index = rs.AddMaterialToLayer(layer)
+                    rs.MaterialColor(index, color)
+            attributes = reader.Attributes(layer=layer)
+            self.attributes[layer] = attributes
+        return attributes
+
+    # z range of the copper on an eagle layer, None for other layers
+    def Copper(self, layer):
+        if layer == 1:
+            return 0.0, COPPER
+        if layer == 16:
+            return -self.thickness - COPPER, -self.thickness
+        return None
+
+    def Add(self, geometry, layer):
+        import Rhino
+        import scriptcontext as sc
+        name, color = LAYERS[layer] if layer in LAYERS else BOARD
+        attributes = self.Attributes(name, color)
+        if isinstance(geometry, Rhino.Geometry.Point3d):
+            return sc.doc.Objects.AddPoint(geometry, attributes)
+        if isinstance(geometry, Rhino.Geometry.Mesh):
+            return sc.doc.Objects.AddMesh(geometry, attributes)
+        return sc.doc.Objects.AddBrep(geometry, attributes)
+
+    def Point(self, x, y, z0, z1):
+        import Rhino
+        return Rhino.Geometry.Point3d(x, y, (z0 + z1) / 2.0)
+
+    def Cylinder(self, x, y, radius, z0, z1):
+        import Rhino
+        circle = Rhino.Geometry.Circle(Rhino.Geometry.Plane(Rhino.Geometry.Point3d(x, y, z0), Rhino.Geometry.Vector3d.ZAxis), radius)
+        return Rhino.Geometry.Cylinder(circle, z1 - z0).ToBrep(True, True)
+
+    # pad of w x h centered at x, y; roundness is the eagle percentage of the
+    # smaller side that is rounded
+    def PlaceSmd(self, x, y, w, h, roundness, layer):
+        z = self.Copper(layer)
+        if z is None:
+            return None
+        z0, z1 = z
+        if self.fidelity == "point":
+            return self.Add(self.Point(x, y, z0, z1), layer)
+        if self.fidelity == "circle":
+            return self.Add(self.Cylinder(x, y, min(w, h) / 2.0, z0, z1), layer)
+        if self.fidelity == "box":
+            return self.Add(Box(x - w / 2.0, y - h / 2.0, x + w / 2.0, y + h / 2.0, z0, z1), layer)
+        f = min(w, h) * roundness / 200.0
+        if self.fidelity == "mesh":
+            return self.Add(Prism(RoundedRectangle(x, y, w, h, f), z0, z1), layer)
+        return self.Add(Extrude(Profile(RoundedCorners(x, y, w, h, f), z0), z0, z1), layer)
+
+    def PlacePad(self, x, y, w, h, roundness, layer):
+        return self.PlaceSmd(x, y, w, h, roundness, layer)
+
+    def PlaceCircle(self, x, y, radius, layer):
+        z = self.Copper(layer)
+        if z is None:
+            return None
+        z0, z1 = z
+        if self.fidelity == "point":
+            return self.Add(self.Point(x, y, z0, z1), layer)
+        if self.fidelity == "box":
+            return self.Add(Box(x - radius, y - radius, x + radius, y + radius, z0, z1), layer)
+        if self.fidelity == "mesh":
+            return self.Add(Prism(Circle(x, y, radius), z0, z1), layer)
+        return self.Add(self.Cylinder(x, y, radius, z0, z1), layer)
+
+    def PlaceRing(self, x, y, r0, r1, layer):
+        z = self.Copper(layer)
+        if z is None:
+            return None
+        z0, z1 = z
+        if self.fidelity in ["point", "circle", "box"]:
+            return self.PlaceCircle(x, y, max(r0, r1), layer)
+        if self.fidelity == "mesh":
+            return self.Add(RingMesh(x, y, r0, r1, z0, z1), layer)
+        import Rhino
+        outer = self.Cylinder(x, y, max(r0, r1), z0, z1)
+        inner = self.Cylinder(x, y, min(r0, r1), z0 - 0.01, z1 + 0.01)
+        ring = Rhino.Geometry.Brep.CreateBooleanDifference(outer, inner, 0.001)
+        return self.Add(ring[0] if ring else outer, layer)
+
+    # copper polygon of corner records, see polygon.Discretize; holes are
+    # lists of corner records too
+    def PlacePolygon(self, points, layer, holes=()):
+        z = self.Copper(layer)
+        if z is None:
+            return None
+        z0, z1 = z
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        if self.fidelity == "point":
+            return self.Add(self.Point(sum(xs) / len(xs), sum(ys) / len(ys), z0, z1), layer)
+        if self.fidelity in ["circle", "box"]:
+            return self.Add(Box(min(xs), min(ys), max(xs), max(ys), z0, z1), layer)
+        if self.fidelity == "mesh":
+            return self.Add(polygon.Mesh([self.Rings(points, holes)], z0, z1), layer)
+        return self.Add(self.PolygonBrep(points, z0, z1, holes), layer)
+
+    # many polygons on one layer, as (points, holes); at mesh fidelity they are
+    # triangulated into a single mesh object
+    def PlacePolygons(self, polygons, layer):
+        z = self.Copper(layer)
+        if z is None:
+            return None
+        if self.fidelity != "mesh":
+            return [self.PlacePolygon(points, layer, holes) for points, holes in polygons]
+        z0, z1 = z
+        return self.Add(polygon.Mesh([self.Rings(points, holes) for points, holes in polygons], z0, z1), layer)
+
+    def Rings(self, points, holes):
+        return polygon.Discretize(points), [polygon.Discretize(x) for x in holes]
+
+    def PolygonBrep(self, points, z0, z1, holes=()):
+        import Rhino
+        import scriptcontext as sc
+        curve = Profile(points, z0)
+        if not holes:
+            return Extrude(curve, z0, z1)
+        curves = [curve] + [Profile(x, z0) for x in holes]
+        face = Rhino.Geometry.Brep.CreatePlanarBreps(curves, sc.doc.ModelAbsoluteTolerance)[0].Faces[0]
+        path = Rhino.Geometry.LineCurve(Rhino.Geometry.Point3d(0, 0, z0), Rhino.Geometry.Point3d(0, 0, z1))
+        return face.CreateExtrusion(path, True)
+
+    # the package rotated, flipped to the bottom when mirrored and moved to
+    # (x, y), with one transform applied as the instance is added
+    def PlaceInstance(self, file, x, y, mirror, rotate):
+        matrix = placement.Transform(x, y, mirror, rotate, self.thickness)
+        return self.library.Insert(file, Xform(matrix), self.Attributes(*PACKAGES))
+
+    # many PlaceInstance argument tuples, with the transforms for all of them
+    # computed at once
+    def PlaceInstances(self, instances):
+        if not instances:
+            return []
+        files, xs, ys, mirrors, rotates = zip(*instances)
+        matrices = placement.Transforms(xs, ys, mirrors, rotates, self.thickness)
+        attributes = self.Attributes(*PACKAGES)
+        return [self.library.Insert(file, Xform(matrix), attributes) for file, matrix in zip(files, matrices)]
+
+    def Layer(self, name, color):
+        self.Attributes(name, color)
+        return name
+
+    def PlacePCB(self, curves):
+        import rhinoscriptsyntax as rs
+        curves = rs.JoinCurves(curves, True)
+        surface = rs.AddPlanarSrf(curves)
+        other = rs.CopyObject(surface, (0, 0, -self.thickness))
+        surfaces = [surface, other]
+        for curve in curves:
+            surfaces.append(rs.ExtrudeCurveStraight(curve, (0, 0, 0), (0, 0, -self.thickness)))
+        rs.DeleteObjects(curves)
+        surface = rs.JoinSurfaces(surfaces, True)
+        rs.ObjectLayer(surface, self.Layer(*BOARD))
+        return surface
@@ -0,0 +1,293 @@
+import numpy as np
+
+# bounding volume hierarchy over the triangles of a mesh
+#
+# nodes are stored flat in arrays; a leaf covers triangles[start:start + count]
+# of the reordered triangle arrays, an interior node has count 0 and children
+# left and right.  queries take whole batches of rays or points and walk the
+# tree once, carrying the subset of the batch that is still alive at each node.
+
+class BVH:
+
+    def __init__(self, vertices, faces, leafSize=16):
+        triangles = vertices[faces]
+        lo = triangles.min(axis=1)
+        hi = triangles.max(axis=1)
+        centroids = triangles.mean(axis=1)
+        order = np.arange(len(faces))
+
+        nodeMin = []
+        nodeMax = []
+        nodeStart = []
+        nodeCount = []
+        nodeLeft = []
+        nodeRight = []
+
+        def AddNode(start, end):
+            nodeMin.append(lo[order[start:end]].min(axis=0))
+            nodeMax.append(hi[order[start:end]].max(axis=0))
+            nodeStart.append(start)
+            nodeCount.append(end - start)
+            nodeLeft.append(-1)
+            nodeRight.append(-1)
+            return len(nodeMin) - 1
+
+        stack = [AddNode(0, len(faces))] if len(faces) else []
+        while stack:
+            node = stack.pop()
+            start = nodeStart[node]
+            end = start + nodeCount[node]
+            if end - start <= leafSize:
+                continue
+            # median split along the longest axis of the centroid extent
+            span = order[start:end]
+            c = centroids[span]
+            axis = np.argmax(c.max(axis=0) - c.min(axis=0))
+            half = (end - start) // 2
+            split = np.argpartition(c[:, axis], half)
+            order[start:end] = span[split]
+            nodeCount[node] = 0
+            nodeLeft[node] = AddNode(start, start + half)
+            nodeRight[node] = AddNode(start + half, end)
+            stack.append(nodeLeft[node])
+            stack.append(nodeRight[node])
+
+        self.nodeMin = np.array(nodeMin).reshape(-1, 3)
+        self.nodeMax = np.array(nodeMax).reshape(-1, 3)
+        self.nodeStart = np.array(nodeStart, np.int64)
+        self.nodeCount = np.array(nodeCount, np.int64)
+        self.nodeLeft = np.array(nodeLeft, np.int64)
+        self.nodeRight = np.array(nodeRight, np.int64)
+        # original face index of each reordered triangle
+        self.index = order
+        triangles = triangles[order]
+        self.v0 = triangles[:, 0]
+        self.e1 = triangles[:, 1] - triangles[:, 0]
+        self.e2 = triangles[:, 2] - triangles[:, 0]
+
+    def __len__(self):
+        return len(self.index)
+
+    def Bounds(self):
+        return self.nodeMin[0], self.nodeMax[0]
+
+    def Triangles(self, start=0, end=None):
+        v0 = self.v0[start:end]
+        return np.stack([v0, v0 + self.e1[start:end], v0 + self.e2[start:end]], axis=1)
+
+    def _Slab(self, node, origins, inverse):
+        ta = (self.nodeMin[node] - origins) * inverse
+        tb = (self.nodeMax[node] - origins) * inverse
+        return np.minimum(ta, tb).max(axis=1), np.maximum(ta, tb).min(axis=1)
+
+    def _Intersect(self, origins, directions, start, end):
+        # Moller-Trumbore for every (ray, triangle) pair of a leaf, inf where
+        # missed; written out per component, np.cross is slow on small arrays
+        v0 = self.v0[start:end].T[:, None]
+        e1 = self.e1[start:end].T[:, None]
+        e2 = self.e2[start:end].T[:, None]
+        d = directions.T[:, :, None]
+        s = origins.T[:, :, None] - v0
+        p = (d[1] * e2[2] - d[2] * e2[1], d[2] * e2[0] - d[0] * e2[2], d[0] * e2[1] - d[1] * e2[0])
+        q = (s[1] * e1[2] - s[2] * e1[1], s[2] * e1[0] - s[0] * e1[2], s[0] * e1[1] - s[1] * e1[0])
+        det = e1[0] * p[0] + e1[1] * p[1] + e1[2] * p[2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse = 1.0 / det
+            u = (s[0] * p[0] + s[1] * p[1] + s[2] * p[2]) * inverse
+            v = (d[0] * q[0] + d[1] * q[1] + d[2] * q[2]) * inverse
+            t = (e2[0] * q[0] + e2[1] * q[1] + e2[2] * q[2]) * inverse
+            valid = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1)
+        return np.where(valid, t, np.inf)
+
+    def _Inverse(self, directions):
+        # keep the slab products finite for axis aligned rays
+        directions = np.where(np.abs(directions) < 1e-30, 1e-30, directions)
+        return 1.0 / directions
+
+    # nearest hit along each ray with tMin < t < tMax; returns t (inf on a miss)
+    # and the original face index (-1 on a miss)
+    def Raycast(self, origins, directions, tMin=1e-6, tMax=np.inf):
+        origins = np.asarray(origins, np.float64)
+        directions = np.asarray(directions, np.float64)
+        inverse = self._Inverse(directions)
+        best = np.full(len(origins), tMax)
+        hit = np.full(len(origins), -1, np.int64)
+        stack = [(0, np.arange(len(origins)))] if len(self) else []
+        while stack:
+            node, rays = stack.pop()
+            t0, t1 = self._Slab(node, origins[rays], inverse[rays])
+            rays = rays[(t0 <= t1) & (t1 >= tMin) & (t0 <= best[rays])]
+            if not len(rays):
+                continue
+            count = self.nodeCount[node]
+            if count == 0:
+                stack.append((self.nodeRight[node], rays))
+                stack.append((self.nodeLeft[node], rays))
+                continue
+            start = self.nodeStart[node]
+            t = self._Intersect(origins[rays], directions[rays], start, start + count)
+            t[t <= tMin] = np.inf
+            nearest = np.argmin(t, axis=1)
+            tn = t[np.arange(len(rays)), nearest]
+            better = tn < best[rays]
+            best[rays[better]] = tn[better]
+            hit[rays[better]] = self.index[start + nearest[better]]
+        best[hit < 0] = np.inf
+        return best, hit
+
+    # number of surface crossings along each ray with t > tMin
+    def Crossings(self, origins, directions, tMin=1e-6):
+        origins = np.asarray(origins, np.float64)
+        directions = np.asarray(directions, np.float64)
+        inverse = self._Inverse(directions)
+        counts = np.zeros(len(origins), np.int64)
+        stack = [(0, np.arange(len(origins)))] if len(self) else []
+        while stack:
+            node, rays = stack.pop()
+            t0, t1 = self._Slab(node, origins[rays], inverse[rays])
+            rays = rays[(t0 <= t1) & (t1 >= tMin)]
+            if not len(rays):
+                continue
+            count = self.nodeCount[node]
+            if count == 0:
+                stack.append((self.nodeRight[node], rays))
+                stack.append((self.nodeLeft[node], rays))
+                continue
+            start = self.nodeStart[node]
+            t = self._Intersect(origins[rays], directions[rays], start, start + count)
+            counts[rays] += ((t > tMin) & np.isfinite(t)).sum(axis=1)
+        return counts
+
+    # points enclosed by a closed mesh, by crossing parity along a skewed ray
+    def Contains(self, points):
+        points = np.asarray(points, np.float64)
+        direction = np.array([0.5773, 0.5774, 0.5775])
+        return self.Crossings(points, np.broadcast_to(direction, points.shape), 0.0) % 2 == 1
+
+    # closest point on the mesh to each query point; returns distance, the
+    # original face index and the closest points
+    def Nearest(self, points, maximumDistance=np.inf):
+        points = np.asarray(points, np.float64)
+        best = np.full(len(points), maximumDistance * maximumDistance)
+        hit = np.full(len(points), -1, np.int64)
+        closest = np.zeros_like(points)
+        stack = [(0, np.arange(len(points)))] if len(self) else []
+        while stack:
+            node, queries = stack.pop()
+            q = points[queries]
+            gap = np.maximum(np.maximum(self.nodeMin[node] - q, q - self.nodeMax[node]), 0)
+            queries = queries[(gap * gap).sum(axis=1) <= best[queries]]
+            if not len(queries):
+                continue
+            count = self.nodeCount[node]
+            if count == 0:
+                # visit the nearer child first so its bound prunes the other
+                left = self.nodeLeft[node]
+                right = self.nodeRight[node]
+                q = points[queries]
+                dl = ((q - (self.nodeMin[left] + self.nodeMax[left]) * 0.5) ** 2).sum(axis=1)
+                dr = ((q - (self.nodeMin[right] + self.nodeMax[right]) * 0.5) ** 2).sum(axis=1)
+                leftFirst = dl <= dr
+                stack.append((right, queries[leftFirst]))
+                stack.append((left, queries[leftFirst]))
+                stack.append((left, queries[~leftFirst]))
+                stack.append((right, queries[~leftFirst]))
+                continue
+            start = self.nodeStart[node]
+            c = ClosestPointOnTriangles(points[queries][:, None], self.v0[start:start + count][None], self.e1[start:start + count][None], self.e2[start:start + count][None])
+            d = ((c - points[queries][:, None]) ** 2).sum(axis=2)
+            nearest = np.argmin(d, axis=1)
+            rows = np.arange(len(queries))
+            dn = d[rows, nearest]
+            better = dn < best[queries]
+            best[queries[better]] = dn[better]
+            hit[queries[better]] = self.index[start + nearest[better]]
+            closest[queries[better]] = c[rows[better], nearest[better]]
+        distance = np.sqrt(best)
+        distance[hit < 0] = np.inf
+        return distance, hit, closest
+
+    # candidate triangle pairs whose bounding boxes overlap, as original face
+    # indices into this mesh and the other mesh
+    def Overlaps(self, other, margin=0.0):
+        pairsA = []
+        pairsB = []
+        # plain tuples, the walk is per node pair and numpy scalars are slow
+        minA = [tuple(x) for x in (self.nodeMin - margin).tolist()]
+        maxA = [tuple(x) for x in (self.nodeMax + margin).tolist()]
+        minB = [tuple(x) for x in other.nodeMin.tolist()]
+        maxB = [tuple(x) for x in other.nodeMax.tolist()]
+        startA, countA, leftA, rightA = [x.tolist() for x in (self.nodeStart, self.nodeCount, self.nodeLeft, self.nodeRight)]
+        startB, countB, leftB, rightB = [x.tolist() for x in (other.nodeStart, other.nodeCount, other.nodeLeft, other.nodeRight)]
+        stack = [(0, 0)] if len(self) and len(other) else []
+        while stack:
+            a, b = stack.pop()
+            la = minA[a]
+            ha = maxA[a]
+            lb = minB[b]
+            hb = maxB[b]
+            if la[0] > hb[0] or la[1] > hb[1] or la[2] > hb[2] or lb[0] > ha[0] or lb[1] > ha[1] or lb[2] > ha[2]:
+                continue
+            leafA = countA[a] > 0
+            leafB = countB[b] > 0
+            if leafA and leafB:
+                pairsA.append(np.repeat(np.arange(startA[a], startA[a] + countA[a]), countB[b]))
+                pairsB.append(np.tile(np.arange(startB[b], startB[b] + countB[b]), countA[a]))
+                continue
+            # descend into the larger of the two nodes
+            sizeA = (ha[0] - la[0]) * (ha[1] - la[1]) * (ha[2] - la[2])
+            sizeB = (hb[0] - lb[0]) * (hb[1] - lb[1]) * (hb[2] - lb[2])
+            if leafB or (not leafA and sizeA >= sizeB):
+                stack.append((leftA[a], b))
+                stack.append((rightA[a], b))
+            else:
+                stack.append((a, leftB[b]))
+                stack.append((a, rightB[b]))
+        if not pairsA:
+            empty = np.zeros(0, np.int64)
+            return empty, empty
+        return self.index[np.concatenate(pairsA)], other.index[np.concatenate(pairsB)]
+
+# closest point on triangle (v0, v0 + e1, v0 + e2) to p, broadcasting over the
+# leading dimensions (Ericson, Real-Time Collision Detection 5.1.5)
+def ClosestPointOnTriangles(p, v0, e1, e2):
+    p, v0, e1, e2 = np.broadcast_arrays(p, v0, e1, e2)
+
+    def Dot(x, y):
+        return (x * y).sum(axis=-1)
+
+    ap = p - v0
+    d1 = Dot(e1, ap)
+    d2 = Dot(e2, ap)
+    bp = ap - e1
+    d3 = Dot(e1, bp)
+    d4 = Dot(e2, bp)
+    cp = ap - e2
+    d5 = Dot(e1, cp)
+    d6 = Dot(e2, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = 1.0 / (va + vb + vc)
+        v = vb * denominator
+        w = vc * denominator
+        result = v0 + e1 * v[..., None] + e2 * w[..., None]
+
+        # edge regions
+        region = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        t = d1 / (d1 - d3)
+        result = np.where(region[..., None], v0 + e1 * t[..., None], result)
+        region = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        t = d2 / (d2 - d6)
+        result = np.where(region[..., None], v0 + e2 * t[..., None], result)
+        region = (va <= 0) & ((d4 - d3) >= 0) & ((d5 - d6) >= 0)
+        t = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        result = np.where(region[..., None], v0 + e1 + (e2 - e1) * t[..., None], result)
+
+    # vertex regions
+    result = np.where(((d1 <= 0) & (d2 <= 0))[..., None], v0, result)
+    result = np.where(((d3 >= 0) & (d4 <= d3))[..., None], v0 + e1, result)
+    result = np.where(((d6 >= 0) & (d5 <= d6))[..., None], v0 + e2, result)
+    return result
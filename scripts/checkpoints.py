@@ -0,0 +1,66 @@
+import glob
+import hashlib
+import json
+import os
+import reader
+import reference
+from loader import Parameters
+
+# finished parts saved to disk so a failed build restarts where it stopped
+#
+# every part is written to <directory>/<key>/<part>.3dm as soon as it is
+# built.  the key is a hash of all the build parameters, the build script and
+# the reference .3dm files next to it, so a build that changes none of them
+# restores its finished parts from the files instead of building them again,
+# and anything else starts a new key.  a part file is written under a
+# temporary name and renamed, so an interrupted write leaves no part behind.
+
+def Key(fireflyIceBlue):
+    digest = hashlib.sha1()
+    digest.update(json.dumps(Parameters(fireflyIceBlue), sort_keys=True).encode("utf-8"))
+    script = fireflyIceBlue.Part.__func__.__code__.co_filename
+    for path in [script] + sorted(glob.glob(os.path.join(fireflyIceBlue.root or ".", "*.3dm"))):
+        digest.update(reference.FileHash(path).encode("utf-8"))
+    return digest.hexdigest()
+
+class Checkpoints:
+
+    def __init__(self, directory, key):
+        self.directory = os.path.join(directory, key)
+
+    def Path(self, part):
+        return os.path.join(self.directory, part + ".3dm")
+
+    def Save(self, part, object):
+        import Rhino
+        import rhinoscriptsyntax as rs
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        model = Rhino.FileIO.File3dm()
+        attributes = Rhino.DocObjects.ObjectAttributes()
+        attributes.LayerIndex = model.AllLayers.AddLayer(part, rs.LayerColor(rs.ObjectLayer(object)))
+        model.Objects.Add(rs.coercegeometry(object), attributes)
+        path = self.Path(part)
+        model.Write(path + ".tmp", 0)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(path + ".tmp", path)
+
+    # add the saved part to the document on its layer, None when there is none
+    def Load(self, part):
+        import rhinoscriptsyntax as rs
+        import scriptcontext as sc
+        path = self.Path(part)
+        if not os.path.exists(path):
+            return None
+        objects = reader.ReadObjects(path)
+        if len(objects) != 1:
+            return None
+        geometry, color = objects[0]
+        if not rs.IsLayer(part):
+            rs.AddLayer(part, color)
+        return sc.doc.Objects.Add(geometry, reader.Attributes(layer=part))
+
+    def Clear(self):
+        for path in glob.glob(os.path.join(self.directory, "*.3dm")):
+            os.remove(path)
@@ -0,0 +1,130 @@
+import math
+import os
+import placement
+
+# checks of the enclosure parameters against the board placement script
+#
+# the post positions, board radius, LED positions and USB edge of the
+# FireflyIceBlue class are copied by hand from the board.  the placement
+# script has the same data: the outline as rs.AddArc3Pt and rs.AddLine calls,
+# the mount holes as rs.AddCircle3Pt calls and the packages as PlaceInstance
+# calls.  the script is only parsed, so the check takes a moment and can run
+# before a build starts.
+#
+# the enclosure is centered on the board point CENTER, every position in the
+# core is relative to it.
+
+CENTER = (17.0, 17.0)
+
+# packages that carry an LED under a light hole in the spacer
+LEDS = ["D0402", "SMLP36", "LED0603"]
+
+# packages of the USB connector, placed on the board edge
+USBS = ["ZX62WD1-B-5PC"]
+
+# largest distance between an LED hole and the nearest LED, the light hole in
+# the spacer is 0.7 mm in radius
+LED_DISTANCE = 0.5
+
+# center and radius of the circle through three points
+def Circle(a, b, c):
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    if abs(d) < 1e-12:
+        return None
+    aa = a[0] * a[0] + a[1] * a[1]
+    bb = b[0] * b[0] + b[1] * b[1]
+    cc = c[0] * c[0] + c[1] * c[1]
+    x = (aa * (b[1] - c[1]) + bb * (c[1] - a[1]) + cc * (a[1] - b[1])) / d
+    y = (aa * (c[0] - b[0]) + bb * (a[0] - c[0]) + cc * (b[0] - a[0])) / d
+    return (x, y), math.hypot(a[0] - x, a[1] - y)
+
+class Board:
+
+    def __init__(self):
+        # ((x, y), radius) of the outline arcs and the mount holes
+        self.arcs = []
+        self.holes = []
+        # ((x, y), (x, y)) of the outline lines
+        self.lines = []
+        # (name, x, y, mirror, rotate)
+        self.instances = []
+
+    def Instances(self, names):
+        return [x for x in self.instances if x[0] in names]
+
+def Read(path):
+    board = Board()
+    for number, name, arguments in placement.Records(path):
+        if name == "PlaceInstance":
+            board.instances.append(tuple(arguments))
+        elif name == "AddArc3Pt":
+            circle = Circle(*arguments)
+            if circle is not None:
+                board.arcs.append(circle)
+        elif name == "AddCircle3Pt":
+            circle = Circle(*arguments)
+            if circle is not None:
+                board.holes.append(circle)
+        elif name == "AddLine":
+            board.lines.append(tuple(arguments))
+    return board
+
+def Distance(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+# the problems found, as report messages; none when everything matches
+def Check(fireflyIceBlue, path):
+    f = fireflyIceBlue
+    tolerance = f.tolerance
+    board = Read(path)
+    problems = []
+    name = os.path.basename(path)
+
+    if not board.arcs:
+        problems.append(name + " has no outline arc")
+    for center, radius in board.arcs:
+        if Distance(center, CENTER) > tolerance:
+            problems.append("outline arc centered at (%.3f, %.3f), enclosure at (%.3f, %.3f)" % (center + CENTER))
+        if abs(radius - f.pcbRadius) > tolerance:
+            problems.append("outline arc radius %.3f, pcbRadius %.3f" % (radius, f.pcbRadius))
+
+    # every post in a mount hole and every mount hole with a post
+    for point in f.postPoints:
+        near = [(Distance(center, point), center, radius) for center, radius in board.holes]
+        if not near or min(near)[0] > tolerance:
+            problems.append("post at (%.3f, %.3f) has no mount hole" % tuple(point))
+            continue
+        distance, center, radius = min(near)
+        if f.postRadius > radius + tolerance:
+            problems.append("post radius %.3f does not fit the %.3f mount hole at (%.3f, %.3f)" % ((f.postRadius, radius) + center))
+    for center, radius in board.holes:
+        if not [x for x in f.postPoints if Distance(center, x) <= tolerance]:
+            problems.append("mount hole at (%.3f, %.3f) has no post" % center)
+
+    # the flat edge of the outline is the USB connector edge
+    edges = [a[1] - CENTER[1] for a, b in board.lines if abs(a[1] - b[1]) <= tolerance]
+    if not edges:
+        problems.append(name + " has no straight outline edge for the USB connector")
+    elif min(abs(x - f.usbPcbEdge) for x in edges) > tolerance:
+        problems.append("straight outline edge at %.3f, usbPcbEdge %.3f" % (min(edges, key=lambda x: abs(x - f.usbPcbEdge)), f.usbPcbEdge))
+    for usb in board.Instances(USBS):
+        if abs(usb[2] - CENTER[1] - f.usbPcbEdge) > tolerance:
+            problems.append("%s at y %.3f, usbPcbEdge %.3f" % (usb[0], usb[2] - CENTER[1], f.usbPcbEdge))
+
+    leds = board.Instances(LEDS)
+    for point in f.ledPoints:
+        near = [Distance(point, (x[1], x[2])) for x in leds]
+        if not near or min(near) > LED_DISTANCE:
+            problems.append("LED hole at (%.3f, %.3f) has no LED within %.1f mm" % (tuple(point) + (LED_DISTANCE,)))
+    return problems
+
+if __name__ == '__main__':
+    import sys
+    import loader
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    path = sys.argv[1] if len(sys.argv) > 1 else loader.ScriptPath(fireflyIceBlue.pcbPath)
+    problems = Check(fireflyIceBlue, path)
+    for problem in problems:
+        print("problem: " + problem)
+    if not problems:
+        print(os.path.basename(path) + " matches the enclosure parameters")
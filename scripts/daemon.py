@@ -0,0 +1,231 @@
+import asyncio
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+import loader
+from firefly import Document
+from loader import Parameters, SetParameter
+
+# long running build server that keeps the Rhino document warm
+#
+# a cold build pays for loading Rhino, the imports, the package and reference
+# .3dm reads and every part.  the server pays for those once: the headless
+# document, the reference and package caches in scriptcontext.sticky and the
+# built parts stay in memory, and parts are shared between requests the way a
+# family build shares them between variants, so a build that only changes the
+# spacer only rebuilds the spacer.
+#
+# requests are json objects, one per line, on a local tcp socket:
+#
+#   {"command": "build", "parameters": {"coreShellWidth": 1.2}, "parts": ["shell"]}
+#   {"command": "analyze", "analysis": "thickness"}
+#   {"command": "export", "output": "out", "formats": ["stl"]}
+#   {"command": "check", "parameters": {...}}
+#   {"command": "status"}
+#   {"command": "shutdown"}
+#
+# and every request gets one json line back, {"ok": true, "result": ...} or
+# {"ok": false, "error": message}, with the "id" of the request if it had one.
+# the geometry work runs on one worker thread in arrival order; status and
+# check are answered straight away while builds wait in the queue.
+
+PORT = 8737
+
+# results of each part kept around for reuse, oldest dropped first
+ENTRIES = 8
+
+# hidden layer of the kept results that are not part of the last build
+CACHE = "build cache"
+
+class BuildServer:
+
+    def __init__(self, port=PORT):
+        self.port = port
+        self.queue = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.family = None
+        self.current = None
+        self.started = time.time()
+        self.requests = 0
+        self.server = None
+
+    # delete the objects of the last build, except the ones kept for reuse
+    # which go to a hidden layer
+    def Release(self):
+        import rhinoscriptsyntax as rs
+        if self.current is None:
+            return
+        kept = set(str(object) for entries in self.family.entries.values() for names, values, object in entries)
+        fireflyIceBlue, objects = self.current
+        for object in objects.values():
+            if not rs.IsObject(object):
+                continue
+            if str(object) in kept:
+                if not rs.IsLayer(CACHE):
+                    rs.AddLayer(CACHE, visible=False)
+                rs.ObjectLayer(object, CACHE)
+            else:
+                rs.DeleteObject(object)
+        self.current = None
+
+    def Prune(self):
+        import rhinoscriptsyntax as rs
+        for part, entries in self.family.entries.items():
+            while len(entries) > ENTRIES:
+                names, values, object = entries.pop(0)
+                if rs.IsObject(object):
+                    rs.DeleteObject(object)
+
+    # the document is made before any request is handled, so the build
+    # script is never loaded while Rhino is not
+    def Setup(self):
+        import family
+        Document()
+        self.family = family.FamilyBuild()
+
+    def Build(self, request):
+        self.Release()
+        self.family.parts = request.get("parts")
+        self.family.variants = {}
+        built = self.family.built
+        reused = self.family.reused
+        start = time.time()
+        objects = self.family.Variant("build", request.get("parameters", {}))
+        fireflyIceBlue = self.family.variants["build"][0]
+        self.current = (fireflyIceBlue, objects)
+        self.Prune()
+        return {
+            "seconds": time.time() - start,
+            "built": self.family.built - built,
+            "reused": self.family.reused - reused,
+            "parts": fireflyIceBlue.report.ToDict()["parts"],
+            "problems": fireflyIceBlue.report.Problems(),
+        }
+
+    def Current(self):
+        if self.current is None:
+            raise ValueError("nothing built yet")
+        return self.current
+
+    def Analyze(self, request):
+        import tessellation
+        fireflyIceBlue, objects = self.Current()
+        analysis = request.get("analysis", "interference")
+        level = request.get("level", "medium")
+        meshes = dict((part, tessellation.Combined([object], level)) for part, object in objects.items())
+        if analysis == "interference":
+            import interference
+            return interference.Check([interference.Part(part, v, f) for part, (v, f) in sorted(meshes.items())])
+        if analysis == "thickness":
+            import thickness
+            result = {}
+            for part, (v, f) in sorted(meshes.items()):
+                analyzed = thickness.Analyze(v, f, threshold=request.get("threshold", 0.8))
+                result[part] = {"minimum": float(analyzed.Minimum()), "regions": analyzed.Regions()}
+            return result
+        raise ValueError("unknown analysis " + analysis)
+
+    def Export(self, request):
+        self.Current()
+        return self.family.Write(request.get("output", "build"), request.get("formats", ["3dm"]), request.get("level", "fine"))
+
+    def Check(self, request):
+        import consistency
+        fireflyIceBlue = loader.FireflyIceBlue()()
+        for name, value in sorted(request.get("parameters", {}).items()):
+            SetParameter(fireflyIceBlue, name, value)
+        return consistency.Check(fireflyIceBlue, loader.ScriptPath(fireflyIceBlue.pcbPath))
+
+    def Status(self, request):
+        return {
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "queued": self.queue.qsize(),
+            "built": self.family.built,
+            "reused": self.family.reused,
+            "parameters": sorted(Parameters(loader.FireflyIceBlue()())),
+        }
+
+    # geometry requests, one at a time on the worker thread
+    async def Worker(self):
+        loop = asyncio.get_event_loop()
+        commands = {"build": self.Build, "analyze": self.Analyze, "export": self.Export}
+        while True:
+            request, future = await self.queue.get()
+            try:
+                result = await loop.run_in_executor(self.executor, commands[request["command"]], request)
+                future.set_result(result)
+            except Exception as error:
+                future.set_exception(error)
+
+    async def Handle(self, request):
+        command = request.get("command")
+        if command in ["build", "analyze", "export"]:
+            future = asyncio.get_event_loop().create_future()
+            await self.queue.put((request, future))
+            return await future
+        if command == "check":
+            return self.Check(request)
+        if command == "status":
+            return self.Status(request)
+        if command == "shutdown":
+            self.server.close()
+            return "shutting down"
+        raise ValueError("unknown command %r" % command)
+
+    async def Connection(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.requests += 1
+            response = {}
+            try:
+                request = json.loads(line.decode("utf-8"))
+                if "id" in request:
+                    response["id"] = request["id"]
+                response["result"] = await self.Handle(request)
+                response["ok"] = True
+            except Exception as error:
+                response["ok"] = False
+                response["error"] = str(error) or type(error).__name__
+            writer.write((json.dumps(response, default=str) + "\n").encode("utf-8"))
+            await writer.drain()
+        writer.close()
+
+    async def Serve(self):
+        self.queue = asyncio.Queue()
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.Setup)
+        worker = asyncio.ensure_future(self.Worker())
+        self.server = await asyncio.start_server(self.Connection, "127.0.0.1", self.port)
+        print("serving builds on 127.0.0.1:%d" % self.port)
+        try:
+            await self.server.wait_closed()
+        finally:
+            worker.cancel()
+
+def Serve(port=PORT):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(BuildServer(port).Serve())
+    finally:
+        loop.close()
+
+# send one request to a running server and return its result
+def Request(command, port=PORT, **fields):
+    fields["command"] = command
+    connection = socket.create_connection(("127.0.0.1", port))
+    try:
+        connection.sendall((json.dumps(fields) + "\n").encode("utf-8"))
+        file = connection.makefile("rb")
+        response = json.loads(file.readline().decode("utf-8"))
+    finally:
+        connection.close()
+    if not response["ok"]:
+        raise ValueError(response["error"])
+    return response["result"]
+
+if __name__ == '__main__':
+    Serve()
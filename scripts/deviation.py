@@ -0,0 +1,156 @@
+import numpy as np
+import mesh
+import tessellation
+from kdtree import KDTree
+
+# geometric difference between two builds of a part
+#
+# the same number of points is sampled over both surfaces and each cloud is
+# put in a kd-tree; the distance from every sample to the nearest sample of
+# the other build is the one-sided deviation, and the larger of the two
+# maxima is the Hausdorff distance.
+#
+# two random samplings of the same surface are up to a couple of sample
+# spacings apart, so a nearest sample closer than three spacings is taken to
+# lie on the same face and the distance is measured to its tangent plane
+# instead.  what is left of the noise is near sharp edges and stays below
+# about two spacings, which is the default heatmap threshold.
+
+class DeviationResult:
+
+    def __init__(self, points, distances, otherPoints, otherDistances, spacing):
+        self.points = points
+        self.distances = distances
+        self.otherPoints = otherPoints
+        self.otherDistances = otherDistances
+        self.spacing = spacing
+
+    # largest distance from the first build to the second
+    def Forward(self):
+        return float(self.distances.max()) if len(self.distances) else 0.0
+
+    # largest distance from the second build to the first
+    def Backward(self):
+        return float(self.otherDistances.max()) if len(self.otherDistances) else 0.0
+
+    def Hausdorff(self):
+        return max(self.Forward(), self.Backward())
+
+    # samples of both builds with their deviation, the first build first
+    def Samples(self):
+        return np.concatenate([self.points, self.otherPoints]), np.concatenate([self.distances, self.otherDistances])
+
+    # deviation binned into cubic cells, largest first; a cell is reported when
+    # its largest deviation is above threshold
+    def Heatmap(self, cellSize=None, threshold=None):
+        if cellSize is None:
+            cellSize = 10 * self.spacing
+        if threshold is None:
+            threshold = 2 * self.spacing
+        points, distances = self.Samples()
+        if not len(points):
+            return []
+        cells = np.floor(points / cellSize).astype(np.int64)
+        keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        count = np.bincount(inverse, minlength=len(keys))
+        total = np.bincount(inverse, distances, minlength=len(keys))
+        largest = np.full(len(keys), -np.inf)
+        np.maximum.at(largest, inverse, distances)
+        heatmap = []
+        for i in np.nonzero(largest > threshold)[0]:
+            heatmap.append({
+                "count": int(count[i]),
+                "maximum": float(largest[i]),
+                "mean": float(total[i] / count[i]),
+                "min": (keys[i] * cellSize).tolist(),
+                "max": ((keys[i] + 1) * cellSize).tolist(),
+            })
+        heatmap.sort(key=lambda cell: -cell["maximum"])
+        return heatmap
+
+    def Summary(self, threshold=None):
+        points, distances = self.Samples()
+        return {
+            "samples": len(distances),
+            "spacing": self.spacing,
+            "forward": self.Forward(),
+            "backward": self.Backward(),
+            "hausdorff": self.Hausdorff(),
+            "mean": float(distances.mean()) if len(distances) else 0.0,
+            "rms": float(np.sqrt((distances * distances).mean())) if len(distances) else 0.0,
+            "heatmap": self.Heatmap(threshold=threshold)[:20],
+        }
+
+# distance from each point to the nearest sample of the other build
+def Distances(points, tree, otherPoints, otherNormals, spacing):
+    distances, nearest = tree.Query(points)
+    near = distances < 3 * spacing
+    offset = points[near] - otherPoints[nearest[near]]
+    distances[near] = np.abs((offset * otherNormals[nearest[near]]).sum(axis=1))
+    return distances
+
+def Compare(verticesA, facesA, verticesB, facesB, samples=100000, seed=0):
+    pointsA, normalsA = mesh.SampleSurface(verticesA, facesA, samples, seed)[:2]
+    pointsB, normalsB = mesh.SampleSurface(verticesB, facesB, samples, seed + 1)[:2]
+    area = max(mesh.SurfaceArea(verticesA, facesA), mesh.SurfaceArea(verticesB, facesB))
+    spacing = np.sqrt(area / max(samples, 1))
+    distancesA = Distances(pointsA, KDTree(pointsB), pointsB, normalsB, spacing)
+    distancesB = Distances(pointsB, KDTree(pointsA), pointsA, normalsA, spacing)
+    return DeviationResult(pointsA, distancesA, pointsB, distancesB, spacing)
+
+# mesh of the solids on a layer of a saved build, without opening it
+def FileLayer(path, layer, level="medium"):
+    import Rhino
+    model = Rhino.FileIO.File3dm.Read(path)
+    if model is None:
+        raise IOError("cannot read " + path)
+    parameters = tessellation.tessellator.Parameters(level)
+    meshes = []
+    for object in model.Objects:
+        index = object.Attributes.LayerIndex
+        found = model.AllLayers.FindIndex(index)
+        if found is None or found.FullPath != layer:
+            continue
+        geometry = object.Geometry
+        if isinstance(geometry, (Rhino.Geometry.Brep, Rhino.Geometry.Extrusion, Rhino.Geometry.Mesh)):
+            meshes.append(mesh.FromGeometry(geometry, parameters))
+    model.Dispose()
+    return mesh.Combine(meshes)
+
+# compare a layer of the document with the same layer of a saved build
+def CompareLayer(layer, path, samples=100000, seed=0, level="medium"):
+    verticesA, facesA = FileLayer(path, layer, level)
+    verticesB, facesB = tessellation.Layer(layer, level)
+    return Compare(verticesA, facesA, verticesB, facesB, samples, seed)
+
+# color the samples of the current build from blue (unchanged) to red (the
+# largest deviation) and add a dot at the worst cells of the heatmap
+def Show(result, layer="deviation", cells=10):
+    import rhinoscriptsyntax as rs
+    rs.AddLayer(layer, 0x0000ff)
+    points = result.otherPoints
+    distances = result.otherDistances
+    if not len(points):
+        return []
+    scale = max(result.Hausdorff(), result.spacing)
+    t = np.clip(distances / scale, 0, 1)
+    colors = [(int(255 * x), 0, int(255 * (1 - x))) for x in t]
+    objects = [rs.AddPointCloud([tuple(p) for p in points], colors)]
+    for cell in result.Heatmap()[:cells]:
+        center = [(a + b) * 0.5 for a, b in zip(cell["min"], cell["max"])]
+        objects.append(rs.AddTextDot("%.3f" % cell["maximum"], center))
+    rs.ObjectLayer(objects, layer)
+    return objects
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    path = rs.OpenFileName("Previous build", "Rhino 3D Models (*.3dm)|*.3dm||")
+    if path:
+        for name in ["top", "spacer", "shell", "back", "clip"]:
+            if not rs.IsLayer(name) or not rs.ObjectsByLayer(name):
+                continue
+            result = CompareLayer(name, path)
+            summary = result.Summary()
+            print("%s: hausdorff %.3f mm, forward %.3f mm, backward %.3f mm, %d changed cells" % (name, summary["hausdorff"], summary["forward"], summary["backward"], len(result.Heatmap())))
+            Show(result, name + " deviation")
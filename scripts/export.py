@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import mesh
+import tessellation
+
+# export of the part layers for tooling and printing
+#
+# each part is hashed and the hash of every file written is kept in a
+# manifest next to the files, so parts that did not change are skipped; the
+# hash of a mesh file also covers the tessellation level and its tolerances.
+# the mesh formats are written by worker threads from the shared mesh arrays
+# in fixed size chunks, threads so the arrays are not copied and the export
+# also works inside Rhino, where worker processes cannot be started; step
+# needs the Rhino exporter and is written on the main thread while the
+# workers run.
+
+PARTS = ["top", "spacer", "shell", "back", "clip"]
+FORMATS = ["stl", "3mf", "step"]
+MANIFEST = "export.json"
+CHUNK = 65536
+
+def WriteStl(path, vertices, faces, name="part"):
+    record = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(name.encode()[:80].ljust(80, b" "))
+        file.write(struct.pack("<I", len(faces)))
+        for start in range(0, len(faces), CHUNK):
+            chunk = faces[start:start + CHUNK]
+            records = np.zeros(len(chunk), record)
+            records['normal'] = mesh.TriangleNormals(vertices, chunk)
+            records['vertices'] = vertices[chunk]
+            file.write(records.tobytes())
+    os.replace(temporary, path)
+    return path
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+RELATIONSHIPS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+def Write3mf(path, vertices, faces, name="part"):
+    temporary = path + ".tmp"
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELATIONSHIPS)
+        with archive.open("3D/3dmodel.model", "w") as model:
+            model.write(('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                         '<metadata name="Title">%s</metadata>\n'
+                         '<resources>\n<object id="1" type="model" name="%s">\n<mesh>\n<vertices>\n' % (name, name)).encode())
+            for start in range(0, len(vertices), CHUNK):
+                lines = ['<vertex x="%.6f" y="%.6f" z="%.6f"/>\n' % tuple(v) for v in vertices[start:start + CHUNK].tolist()]
+                model.write("".join(lines).encode())
+            model.write(b'</vertices>\n<triangles>\n')
+            for start in range(0, len(faces), CHUNK):
+                lines = ['<triangle v1="%d" v2="%d" v3="%d"/>\n' % tuple(f) for f in faces[start:start + CHUNK].tolist()]
+                model.write("".join(lines).encode())
+            model.write(b'</triangles>\n</mesh>\n</object>\n</resources>\n<build>\n<item objectid="1"/>\n</build>\n</model>\n')
+    os.replace(temporary, path)
+    return path
+
+WRITERS = {"stl": WriteStl, "3mf": Write3mf}
+
+# None when the Rhino exporter fails or is cancelled; the temporary file
+# keeps the extension the exporter picks the format by
+def WriteStep(path, objects):
+    import rhinoscriptsyntax as rs
+    root, extension = os.path.splitext(path)
+    temporary = root + ".tmp" + extension
+    rs.UnselectAllObjects()
+    rs.SelectObjects(objects)
+    exported = rs.Command('_-Export "' + temporary + '" _Enter _Enter', False)
+    rs.UnselectAllObjects()
+    if not exported or not os.path.exists(temporary):
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return None
+    os.replace(temporary, path)
+    return path
+
+# hash of the geometry of a part, and of how it is tessellated when a level
+# is given
+def PartHash(objects, level=None):
+    digest = hashlib.sha1()
+    for h in sorted(tessellation.Hash(x) for x in objects):
+        digest.update(h.encode())
+    if level is not None:
+        digest.update(json.dumps([level, tessellation.Tolerances(level)], sort_keys=True).encode())
+    return digest.hexdigest()
+
+def ReadManifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def WriteManifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+# parts maps a part name to its document objects; returns the paths written,
+# files whose hash matches the manifest are skipped
+def ExportParts(directory, parts, formats=FORMATS, workers=None, level="fine"):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    manifest = ReadManifest(directory)
+    work = []
+    for name, objects in sorted(parts.items()):
+        if not objects:
+            continue
+        geometry = PartHash(objects)
+        tessellated = PartHash(objects, level)
+        entry = manifest.setdefault(name, {})
+        for format in formats:
+            path = os.path.join(directory, name + "." + format)
+            h = tessellated if format in WRITERS else geometry
+            if entry.get(format) != h or not os.path.exists(path):
+                work.append((name, objects, format, path, h))
+
+    written = []
+    executor = ThreadPoolExecutor(workers or os.cpu_count() or 1) if workers != 0 else None
+    try:
+        futures = []
+        for name, objects, format, path, h in work:
+            if format not in WRITERS:
+                continue
+            vertices, faces = tessellation.Combined(objects, level)
+            if executor is None:
+                WRITERS[format](path, vertices, faces, name)
+            else:
+                futures.append(executor.submit(WRITERS[format], path, vertices, faces, name))
+        # step goes through the Rhino exporter while the workers write meshes;
+        # a failed export keeps its old manifest entry, so it is tried again
+        failed = []
+        for name, objects, format, path, h in work:
+            if format == "step" and WriteStep(path, objects) is None:
+                print("exporting " + path + " failed")
+                failed.append(path)
+        for future in futures:
+            future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for name, objects, format, path, h in work:
+        if path in failed:
+            continue
+        manifest[name][format] = h
+        written.append(path)
+    WriteManifest(directory, manifest)
+    return written
+
+def ExportLayers(directory, layers=PARTS, formats=FORMATS, workers=None):
+    import rhinoscriptsyntax as rs
+    parts = {}
+    for layer in layers:
+        if rs.IsLayer(layer):
+            parts[layer] = [x for x in (rs.ObjectsByLayer(layer) or []) if mesh.IsSolid(x)]
+    return ExportParts(directory, parts, formats, workers)
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    directory = rs.BrowseForFolder(None, "Export part layers to")
+    if directory:
+        for path in ExportLayers(directory):
+            print("wrote " + path)
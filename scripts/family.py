@@ -0,0 +1,155 @@
+import json
+import os
+import time
+import loader
+from loader import Parameters, SetParameter
+
+# builds of a family of product variants that share most of their parts
+#
+# while a part is built, every parameter it reads is recorded.  the part only
+# depends on those values, so another variant with the same values for the
+# same parameters gets a copy of the part instead of a new build: a variant
+# that only changes the spacer rebuilds the spacer and copies the rest.  the
+# parameters a part reads can depend on other parameters (fourPartDesign adds
+# the LED holes), so each part keeps a list of (parameters read, values,
+# object) entries and a variant matches an entry when it has the same values
+# for all of that entry's parameters.
+#
+# each variant ends up on its own parent layer, "<variant>::shell" and so on.
+
+def Tracked(fireflyIceBlue):
+    parameters = set(Parameters(fireflyIceBlue))
+
+    class Tracked(type(fireflyIceBlue)):
+
+        def __getattribute__(self, name):
+            reads = object.__getattribute__(self, "__dict__").get("reads")
+            if reads is not None and name in parameters:
+                reads.add(name)
+            return object.__getattribute__(self, name)
+
+    fireflyIceBlue.__class__ = Tracked
+    fireflyIceBlue.reads = None
+    return fireflyIceBlue
+
+# parameter values as a hashable key, lists of points become tuples
+def Key(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(Key(x) for x in value)
+    return value
+
+class FamilyBuild:
+
+    def __init__(self, base=None, parts=None):
+        self.base = base or {}
+        self.parts = parts
+        # part name: [(parameter names, values, object)]
+        self.entries = {}
+        self.variants = {}
+        self.built = 0
+        self.reused = 0
+
+    def Create(self, name, overrides):
+        fireflyIceBlue = Tracked(loader.FireflyIceBlue()())
+        fireflyIceBlue.root = os.path.dirname(loader.ScriptPath("")) + os.sep
+        for parameters in [self.base, overrides]:
+            for parameter, value in sorted(parameters.items()):
+                SetParameter(fireflyIceBlue, parameter, value)
+        fireflyIceBlue.Check()
+        return fireflyIceBlue
+
+    def Find(self, fireflyIceBlue, part):
+        import rhinoscriptsyntax as rs
+        for names, values, object in self.entries.get(part, []):
+            if rs.IsObject(object) and tuple(Key(getattr(fireflyIceBlue, x)) for x in names) == values:
+                return object
+        return None
+
+    def Move(self, variant, part, object):
+        import rhinoscriptsyntax as rs
+        layer = variant + "::" + part
+        if not rs.IsLayer(layer):
+            color = rs.LayerColor(part) if rs.IsLayer(part) else None
+            rs.AddLayer(layer, color)
+        rs.ObjectLayer(object, layer)
+
+    # build or copy the parts of one variant, returns {part: object}
+    def Variant(self, variant, overrides):
+        import rhinoscriptsyntax as rs
+        fireflyIceBlue = self.Create(variant, overrides)
+        fireflyIceBlue.report.title = "Firefly Ice Blue Core " + variant
+        objects = {}
+        for part in self.parts or fireflyIceBlue.parts:
+            attribute = fireflyIceBlue.PARTS[part][0]
+            source = self.Find(fireflyIceBlue, part)
+            if source is not None:
+                object = rs.CopyObject(source)
+                setattr(fireflyIceBlue, attribute, object)
+                fireflyIceBlue.report.Add(part, object, fireflyIceBlue.densities.get(part, fireflyIceBlue.density))
+                self.reused += 1
+            else:
+                fireflyIceBlue.reads = set()
+                object = fireflyIceBlue.Part(part)
+                names = tuple(sorted(fireflyIceBlue.reads))
+                fireflyIceBlue.reads = None
+                values = tuple(Key(getattr(fireflyIceBlue, x)) for x in names)
+                self.entries.setdefault(part, []).append((names, values, object))
+                self.built += 1
+            self.Move(variant, part, object)
+            objects[part] = object
+        self.variants[variant] = (fireflyIceBlue, objects)
+        return objects
+
+    def Build(self, variants):
+        start = time.time()
+        for variant, overrides in sorted(variants.items()):
+            self.Variant(variant, overrides)
+        print("%d variants: %d parts built, %d reused in %.1f s" % (len(variants), self.built, self.reused, time.time() - start))
+        return self.variants
+
+    # a build report, a .3dm with only the variant's parts and any mesh formats
+    # in a directory per variant
+    def Write(self, directory, formats=["3dm"], level="fine"):
+        import Rhino
+        import rhinoscriptsyntax as rs
+        written = []
+        for variant, (fireflyIceBlue, objects) in sorted(self.variants.items()):
+            output = os.path.join(directory, variant)
+            if not os.path.isdir(output):
+                os.makedirs(output)
+            fireflyIceBlue.report.Write(os.path.join(output, "build-report.json"))
+            if "3dm" in formats:
+                path = os.path.join(output, "firefly-ice-blue-core.3dm")
+                model = Rhino.FileIO.File3dm()
+                for part, object in sorted(objects.items()):
+                    index = model.AllLayers.AddLayer(part, rs.LayerColor(rs.ObjectLayer(object)))
+                    attributes = Rhino.DocObjects.ObjectAttributes()
+                    attributes.LayerIndex = index
+                    model.Objects.Add(rs.coercegeometry(object), attributes)
+                model.Write(path, 0)
+                written.append(path)
+            meshes = [x for x in formats if x != "3dm"]
+            if meshes:
+                import export
+                written += export.ExportParts(output, dict((part, [object]) for part, object in objects.items()), meshes, level=level)
+        return written
+
+# {"base": {parameter: value}, "variants": {name: {parameter: value}}}
+def Read(path):
+    with open(path) as file:
+        family = json.load(file)
+    return family.get("base", {}), family["variants"]
+
+def BuildFamily(path, parts=None):
+    base, variants = Read(path)
+    family = FamilyBuild(base, parts)
+    family.Build(variants)
+    return family
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    path = rs.OpenFileName("Variants", "Variant files (*.json)|*.json||")
+    if path:
+        family = BuildFamily(path)
+        for path in family.Write(os.path.join(os.path.dirname(path), "variants")):
+            print("wrote " + path)
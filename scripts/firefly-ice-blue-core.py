@@ -1,6 +1,26 @@
-import rhinoscriptsyntax as rs
+# rhinoscriptsyntax is only needed to build; without it the class can still be
+# loaded to read its parameters.  a headless build loads Rhino after this
+# script, so then rs imports rhinoscriptsyntax on first use
+class LazyRhinoscript:
+
+    def __getattr__(self, name):
+        global rs
+        import rhinoscriptsyntax
+        rs = rhinoscriptsyntax
+        return getattr(rs, name)
+
+try:
+    import rhinoscriptsyntax as rs
+except ImportError:
+    rs = LazyRhinoscript()
 import math
+import os
+import time
 from datetime import datetime
+import metrics
+import reference
+import consistency
+import checkpoints
 
 class PathXY:
     
@@ -157,8 +177,8 @@ class Path:
     def Revolve(self):
         self.Join()
         curve = self.curves[0]
-    	surface = rs.AddRevSrf(curve, self.axis)
-    	rs.DeleteObject(curve)
+        surface = rs.AddRevSrf(curve, self.axis)
+        rs.DeleteObject(curve)
         self.curves = []
         return surface
 
@@ -173,8 +193,8 @@ class Path:
         self.Join()
         surfaces = []
         curve = self.curves[0]
-    	surfaces.append(rs.AddRevSrf(curve, self.axis))
-    	rs.DeleteObject(curve)
+        surfaces.append(rs.AddRevSrf(curve, self.axis))
+        rs.DeleteObject(curve)
         self.curves = []
         if first:
             surfaces.append(self.CreateCircularSurface(self.firstPoint[2], self.firstPoint[0]))
@@ -182,7 +202,16 @@ class Path:
             surfaces.append(self.CreateCircularSurface(self.currentPoint[2], self.currentPoint[0]))
         return rs.JoinSurfaces(surfaces, True)
 
-class FireflyIceBlue:
+class FireflyIceBlue(object):
+
+    # part name: (attribute holding the part, method that builds it)
+    PARTS = {
+        "top": ("coreTop", "CreateCoreTop"),
+        "spacer": ("coreSpacer", "CreateCoreSpacer"),
+        "shell": ("coreShell", "CreateCoreShell"),
+        "back": ("coreBack", "CreateCoreBack"),
+        "clip": ("coreClip", "CreateClip"),
+    }
 
     def __init__(self):
         self.coreInnerRadius = 18.4
@@ -229,30 +258,139 @@ class FireflyIceBlue:
         self.clipLipHeight = 1.65
         self.clipLipThickness = 2.5
 
+        self.density = metrics.DENSITIES["abs"]
+        self.densities = {}
+
         self.coreShell = None
         self.coreBack = None
         self.coreSpacer = None
         self.coreTop = None
-        self.clip = None
+        self.coreClip = None
+        # parts built by Create() when none are named
+        self.parts = ["top", "spacer", "shell", "back"]
 
         self.root = ""
+        self.reportPath = "build-report.json"
+        # board placement script the parameters are checked against before a
+        # build, relative to root; empty to skip the check
+        self.pcbPath = "firefly-ice-blue-pcb.py"
+        # directory, relative to root or absolute, where every finished part
+        # is saved; a build with the same parameters and files restores parts
+        # from there instead of building them again.  empty to always build
+        self.checkpointPath = ""
+        # the checkpoints of the current build, keyed once, see Checkpoints()
+        self.saved = None
+        self.report = metrics.BuildReport("Firefly Ice Blue Core")
+        # objects with BeginStage(name) and EndStage(name, result) methods
+        self.listeners = []
+        # named step of the part being built, see Step()
+        self.step = None
 
     def CreateLayer(self, name, color, surface):
         rs.AddLayer(name, color)
         rs.ObjectLayer(surface, name)
-        if not rs.IsPolysurfaceClosed(surface):
-            rs.MessageBox(name + " is not a closed polysurface")
+        part = self.report.Add(name, surface, self.densities.get(name, self.density))
+        if not part.Closed():
+            print(name + " is not a closed polysurface")
+
+    def CreatePart(self, name, create):
+        for listener in self.listeners:
+            listener.BeginStage(name)
+        start = time.time()
+        create()
+        self.EndStep()
+        self.report.SetBuildTime(name, time.time() - start)
+        part = self.report.Part(name)
+        for listener in self.listeners:
+            listener.EndStage(name, part.object if part else None)
+
+    # start a named step of the part being built and end the one before it;
+    # listeners see steps as stages inside the part's stage
+    def Step(self, name):
+        self.EndStep()
+        for listener in self.listeners:
+            listener.BeginStage(name)
+        self.step = name
+
+    def EndStep(self):
+        if self.step is not None:
+            for listener in self.listeners:
+                listener.EndStage(self.step, None)
+            self.step = None
+
+    # the named part, built on first use and again if it was deleted
+    def Part(self, name):
+        attribute, create = self.PARTS[name]
+        part = getattr(self, attribute)
+        if part is None or not rs.IsObject(part):
+            setattr(self, attribute, None)
+            saved = self.Checkpoints()
+            part = saved.Load(name) if saved else None
+            if part is not None:
+                setattr(self, attribute, part)
+                self.report.Add(name, part, self.densities.get(name, self.density))
+            else:
+                self.CreatePart(name, getattr(self, create))
+                part = getattr(self, attribute)
+                if saved and part is not None:
+                    saved.Save(name, part)
+        return part
+
+    # the key hashes the parameters and every .3dm file, so it is taken once
+    # for the first part a build needs and again after Reset
+    def Checkpoints(self):
+        if not self.checkpointPath:
+            return None
+        if self.saved is None:
+            self.saved = checkpoints.Checkpoints(os.path.join(self.root, self.checkpointPath), checkpoints.Key(self))
+        return self.saved
+
+    top = property(lambda self: self.Part("top"))
+    spacer = property(lambda self: self.Part("spacer"))
+    shell = property(lambda self: self.Part("shell"))
+    back = property(lambda self: self.Part("back"))
+    clip = property(lambda self: self.Part("clip"))
+
+    # forget built parts so the next access builds them again
+    def Reset(self, parts=None):
+        for name in parts or self.PARTS:
+            setattr(self, self.PARTS[name][0], None)
+        self.saved = None
+
+    def Build(self, parts=None):
+        return [self.Part(name) for name in parts or self.parts]
 
     def ImportObject(self, file):
-        rs.Command("_-Insert _File=_Yes " + self.root + file + ".3dm B 0,0,0 1 0 _Enter")
-        object = rs.SelectedObjects()[0]
-        rs.UnselectAllObjects()
-        object = rs.ExplodeBlockInstance(object)[0]
-        return object
+        return reference.Insert(self.root + file + ".3dm")[0]
+
+    # pieces of object split by cutting, which check(pieces) accepts.  a split
+    # that fails or gives unexpected pieces is tried again with the cutter
+    # moved by half the tolerance either way and then with a coarser and a
+    # finer tolerance; the object is only deleted once a split is accepted
+    def Split(self, object, cutting, check=None):
+        import scriptcontext as sc
+        tolerance = sc.doc.ModelAbsoluteTolerance
+        d = tolerance / 2
+        attempts = [(None, 1.0), ((d, d, d), 1.0), ((-d, -d, -d), 1.0), (None, 2.0), (None, 0.5)]
+        for offset, scale in attempts:
+            cutter = cutting if offset is None else rs.CopyObject(cutting, offset)
+            sc.doc.ModelAbsoluteTolerance = tolerance * scale
+            try:
+                pieces = rs.SplitBrep(object, cutter, False)
+            finally:
+                sc.doc.ModelAbsoluteTolerance = tolerance
+                if cutter is not cutting:
+                    rs.DeleteObject(cutter)
+            if pieces and (check is None or check(pieces)):
+                rs.DeleteObject(object)
+                return pieces
+            if pieces:
+                rs.DeleteObjects(pieces)
+        raise ValueError("split failed in %s" % (self.step or "build"))
 
     def Cut(self, polysurface, holes):
         for hole in holes:
-            new = rs.SplitBrep(polysurface, hole, True)
+            new = self.Split(polysurface, hole, lambda pieces: [x for x in pieces if rs.IsPolysurface(x)])
             polysurface = next(x for x in new if rs.IsPolysurface(x))
             for n in new:
                 if n is not polysurface:
@@ -260,16 +398,16 @@ class FireflyIceBlue:
         return rs.JoinSurfaces([polysurface] + holes, True)
     
     def SplitAndKeep(self, object, cutting, index, axis=1):
-        objects = rs.SplitBrep(object, cutting, True)
-        # sort split object parts by centroid y
-        meta = [(i, rs.SurfaceAreaCentroid(objects[i])[0][axis]) for i in range(len(objects))]
-        meta.sort(key=lambda iy: iy[1])
-        # delete other parts
         try:
             exclusion = set(index)
         except TypeError:
             exclusion = set()
             exclusion.add(index)
+        objects = self.Split(object, cutting, lambda pieces: max(exclusion) < len(pieces))
+        # sort split object parts by centroid y
+        meta = [(i, rs.SurfaceAreaCentroid(objects[i])[0][axis]) for i in range(len(objects))]
+        meta.sort(key=lambda iy: iy[1])
+        # delete other parts
         results = []
         for i in range(len(meta)):
             object = objects[meta[i][0]]
@@ -280,7 +418,7 @@ class FireflyIceBlue:
         return results[0] if len(results) == 1 else results
     
     def SplitAndKeepLargest(self, object, cutting):
-        objects = rs.SplitBrep(object, cutting, True)
+        objects = self.Split(object, cutting)
         # sort split object parts by surface area
         meta = [(i, rs.SurfaceArea(objects[i])[0]) for i in range(len(objects))]
         meta.sort(key=lambda iy: iy[1])
@@ -291,7 +429,7 @@ class FireflyIceBlue:
         return objects[meta[len(meta) - 1][0]]
     
     def SplitAndKeepSmallest(self, object, cutting):
-        objects = rs.SplitBrep(object, cutting, True)
+        objects = self.Split(object, cutting)
         # sort split object parts by surface area
         meta = [(i, rs.SurfaceArea(objects[i])[0]) for i in range(len(objects))]
         meta.sort(key=lambda iy: -iy[1])
@@ -389,9 +527,10 @@ class FireflyIceBlue:
         polysurface = path.Revolve()
         
         # cut the press fit slots required for making molds
+        self.Step("press fit slots")
         curve = rs.AddLine((x2, 0, y0), (x2, 0, y2))
         cut1 = rs.AddRevSrf(curve, ((0, 0, 0), (0, 0, 1)), -15, 15)
-    	rs.DeleteObject(curve)
+        rs.DeleteObject(curve)
         box = rs.BoundingBox(cut1)
         xa = box[0][0]
         ya = box[0][1]
@@ -409,6 +548,7 @@ class FireflyIceBlue:
         polysurface = rs.JoinSurfaces([polysurface, cut1, cut2], True)
 
         # cut the USB opening
+        self.Step("USB opening")
         zb = self.coreShellHeight - self.coreSpacerLedgeHeight - self.pcbTopClearance - self.pcbThickness
         usb = self.ImportObject("usb-opening")
         rs.MoveObject(usb, (0, 0, zb - 1.3))
@@ -416,6 +556,7 @@ class FireflyIceBlue:
         polysurface = self.Cut(polysurface, [usb])
 
         # add "keyed" areas to shell for aligning spacer
+        self.Step("keyed areas")
         for a in self.alignmentAngles:
             key = self.CreateKey(y4 - self.coreSpacerInnerHeight, y4)
             rs.RotateObject(key, (0, 0, 0), a)
@@ -591,6 +732,7 @@ class FireflyIceBlue:
         path.Fillet(self.corePressNub);
         polysurface = path.RevolveSolid()
         
+        self.Step("post holes")
         posts = []
         for point in self.postPoints:
             post = self.CreatePostHole()
@@ -600,6 +742,7 @@ class FireflyIceBlue:
             posts.append(post)
         polysurface = self.Cut(polysurface, posts)
     
+        self.Step("battery pocket")
         xb = self.batteryHeight / 2
         yb = (self.postPoints[0][1] - 17) - self.postMateOuterRadius - 0.2
         xa = -xb
@@ -607,6 +750,7 @@ class FireflyIceBlue:
         inset = self.CreateRoundedRectangleCutDown(xa, ya, xb, yb, y7 - self.batteryThickness - self.batterySwell, y6)
         polysurface = self.Cut(polysurface, [inset])
 
+        self.Step("USB cap")
         cap = self.ImportObject("usb-cap")
         rs.MoveObject(cap, (0, self.usbPcbEdge, y6))
         circle = rs.AddCircle3Pt((0, x0, y6), (-x0, 0, y6), (x0, 0, y6))
@@ -623,6 +767,7 @@ class FireflyIceBlue:
         polysurface = self.Cut(polysurface, [cap, b1, b2])
         
         # supports to prevent squishing between top/spacer and back
+        self.Step("supports")
         sections = [(-20, 20), (180 - 20, 180 + 20), (180 + 45, 180 + 65), (360 - 65, 360 - 45)]
         for section in sections:
             a0 = section[0] * math.pi / 180
@@ -700,6 +845,7 @@ class FireflyIceBlue:
         path.LineTo(x1, y3)
         polysurface = path.RevolveSolid()
 
+        self.Step("LEDs")
         if self.fourPartDesign:
             slots = []
             for i in range(4):
@@ -746,6 +892,7 @@ class FireflyIceBlue:
                 barriers.append(barrier)
             polysurface = self.Cut(polysurface, barriers)
 
+        self.Step("posts")
         posts = []
         for point in self.postPoints:
             post = self.CreatePost()
@@ -758,6 +905,7 @@ class FireflyIceBlue:
         polysurface = self.Cut(polysurface, posts)
     
         # shell alignment key holes
+        self.Step("key holes")
         for a in self.alignmentAngles:
             hole = self.CreateKeyHole(y0, y1)
             rs.RotateObject(hole, (0, 0, 0), a)
@@ -765,6 +913,7 @@ class FireflyIceBlue:
             polysurface = rs.JoinSurfaces([polysurface, hole], True)
     
         # support ledge for USB connector
+        self.Step("support ledge")
         z1 = y0
         z0 = y0 - self.pcbThickness + self.usbLowerEdge
         d = self.GetDraftDistance(z0, z1)
@@ -780,6 +929,7 @@ class FireflyIceBlue:
         polysurface = self.Cut(polysurface, [support])
     
         # antenna is 1.2 mm max height, make core-out for 0.2 mm
+        self.Step("antenna core-out")
         x = 19.558 - 17
         y = 2.921 - 17
         xa = x - 4.3 / 2
@@ -811,6 +961,7 @@ class FireflyIceBlue:
         polysurface = path.RevolveSolid()
         
         if self.fourPartDesign:
+            self.Step("plugs and LED holes")
             plugs = []
             for i in range(4):
                 a = 180 - 15 + 10 * i
@@ -833,7 +984,7 @@ class FireflyIceBlue:
                 holes.append(hole)
             polysurface = self.Cut(polysurface, holes)
 
-        self.coreSpacer = polysurface
+        self.coreTop = polysurface
         self.CreateLayer("top", 0xffffff, polysurface)
 
     def Width(self, object):
@@ -871,6 +1022,7 @@ class FireflyIceBlue:
         
         armWidth = 8
         # cut entry side
+        self.Step("entry side")
         r = x4
         d = x2 - math.sqrt(x2 * x2 - (armWidth / 2) * (armWidth / 2))
         e = x2 - d
@@ -891,6 +1043,7 @@ class FireflyIceBlue:
         polysurface = rs.JoinSurfaces([polysurface, extrusion], True)
 
         # arm
+        self.Step("arm")
         flatThickness = 2.5
         armInset = 2.5
         if milling:
@@ -945,6 +1098,7 @@ class FireflyIceBlue:
         polysurface = self.Fuse(polysurface, spring)
         
         # cut milling slot
+        self.Step("milling slot")
         y0 = -0.2
         y2 = self.coreShellHeight + self.clipLipHeight
         x1 = self.coreInnerRadius + self.coreShellWidth + self.tolerance
@@ -970,7 +1124,7 @@ class FireflyIceBlue:
         polysurface = self.SplitAndKeepLargest(polysurface, cut)
         polysurface = rs.JoinSurfaces([polysurface, cut], True)
 
-        self.clip = polysurface
+        self.coreClip = polysurface
         self.CreateLayer("clip", 0xff00ff, polysurface)
     
     def CreateClipTop(self):
@@ -992,20 +1146,43 @@ class FireflyIceBlue:
         path.ClosePath()
         polysurface = path.Revolve()
         
-        self.clip = polysurface
+        self.coreClip = polysurface
         self.CreateLayer("clip", 0xff00ff, polysurface)
     
-    def Create(self):
+    # the placement script in root, or else next to this script
+    def PcbPath(self):
+        script = os.path.dirname(os.path.abspath(self.Check.__func__.__code__.co_filename))
+        for path in [self.root + self.pcbPath, os.path.join(script, self.pcbPath)]:
+            if os.path.exists(path):
+                return path
+        return None
+
+    # stop before any CAD work when the parameters copied from the board do
+    # not match its placement script
+    def Check(self):
+        if not self.pcbPath:
+            return
+        path = self.PcbPath()
+        if path is None:
+            print("skipping the board check, " + self.pcbPath + " not found")
+            return
+        problems = consistency.Check(self, path)
+        if problems:
+            raise ValueError("parameters do not match " + self.pcbPath + ":\n" + "\n".join(problems))
+
+    def Create(self, parts=None):
         now = datetime.now()
         rs.Notes("Firefly Ice Blue Core Revision 1.7 WIP " + now.strftime('%Y-%m-%d %H:%M:%S') + "\n" +
                  "\n" +
                  "Changes Since 1.6 REL\n" +
                  "- add clip\n")
-#        self.CreateClip();
-        self.CreateCoreTop()
-        self.CreateCoreSpacer()
-        self.CreateCoreShell()
-        self.CreateCoreBack()
+        self.Check()
+        self.report = metrics.BuildReport("Firefly Ice Blue Core")
+        self.Reset(parts)
+        self.Build(parts)
+        if self.reportPath:
+            self.report.Write(self.root + self.reportPath)
+        print(self.report.Summary())
 
 if __name__ == '__main__':
     fireflyIceBlue = FireflyIceBlue()
@@ -1,50 +1,35 @@
 import rhinoscriptsyntax as rs
+import board as boards
+import packages
+import placement
 
 root = ""
 
 boardThickness = 1.6
 
+library = packages.Library(root + "packages/")
+# read the packages this board uses while the pads and outline are built
+library.Prefetch(placement.PackageNames(__file__))
+
+# "circle" is enough for enclosure fit checks, see board.FIDELITIES
+board = boards.Board(library, boardThickness, "circle")
+
+# the generated lines below set boardThickness after these helpers
+def Board():
+    board.thickness = boardThickness
+    return board
+
 def PlaceInstance(file, x, y, mirror, rotate):
-    rs.Command("_-Insert _File=_Yes " + root + "packages/" + file + ".3dm B 0,0,0 1 0 _Enter")
-    objects = rs.SelectedObjects()
-    if not len(objects):
-        return None
-    object = objects[0]
-    rs.UnselectAllObjects()
-    rs.RotateObject(object, (0, 0, 0), rotate)
-    if mirror:
-        rs.RotateObject(object, (0, 0, 0), 180, (0, 1, 0))
-        rs.MoveObject(object, (0, 0, -boardThickness))
-    rs.MoveObject(object, (x, y, 0))
-    return object
+    return Board().PlaceInstance(file, x, y, mirror, rotate)
 
 def PlaceCircle(x, y, radius, layer):
-    if (layer != 1) and (layer != 16):
-        return None
-    object = rs.AddCylinder((x, y, 0), 0.1, radius)
-    index = rs.AddMaterialToObject(object)
-    if layer == 1:
-        rs.MaterialColor(index, (255, 0, 0))
-    if layer == 16:
-        rs.MaterialColor(index, (0, 0, 255))
-        rs.MoveObject(object, (0, 0, -boardThickness - 0.1))
-    return object
+    return Board().PlaceCircle(x, y, radius, layer)
 
 def PlaceSmd(x, y, w, h, r, layer):
-    return PlaceCircle(x, y, min(w, h) / 2.0, layer)
+    return Board().PlaceSmd(x, y, w, h, r, layer)
 
 def PlacePCB(curves):
-    curves = rs.JoinCurves(curves, True)
-    surface = rs.AddPlanarSrf(curves)
-    other = rs.CopyObject(surface, (0, 0, -boardThickness))
-    surfaces = [surface, other]
-    for curve in curves:
-        surfaces.append(rs.ExtrudeCurveStraight(curve, (0, 0, 0), (0, 0, -boardThickness)))
-    rs.DeleteObjects(curves)
-    surface = rs.JoinSurfaces(surfaces, True)
-    index = rs.AddMaterialToObject(surface)
-    rs.MaterialColor(index, (20, 150, 20))
-    return surface
+    return Board().PlacePCB(curves)
 
 boardThickness = 0.85
 
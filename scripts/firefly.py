@@ -0,0 +1,220 @@
+import argparse
+import ast
+import json
+import os
+import sys
+import loader
+from loader import Parameters, SetParameter
+
+# command line entry point for building and checking the enclosure
+#
+#   python firefly.py build --parts shell,back --set coreShellWidth=1.2 --format stl --output out
+#   python firefly.py build --trace build-trace.json
+#   python firefly.py family variants.json --format 3dm,stl --output variants
+#   python firefly.py check --set usbPcbEdge=16.4
+#   python firefly.py serve --port 8737
+#   python firefly.py parameters
+#   python firefly.py report out/build-report.json
+#   python firefly.py compare golden/firefly-ice-blue-core.json new.json
+#
+# build runs the FireflyIceBlue class against a headless Rhino document
+# (rhinoinside) or the open document when run inside Rhino.  the other
+# commands only read files, and nothing that needs Rhino or numpy is imported
+# until a command asks for it.
+
+FORMATS = ["3dm", "stl", "3mf", "step"]
+
+def ParseValue(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+# apply name=value overrides from the command line
+def Override(fireflyIceBlue, settings):
+    for setting in settings:
+        name, separator, text = setting.partition("=")
+        if not separator:
+            raise ValueError("expected name=value, got " + setting)
+        SetParameter(fireflyIceBlue, name, ParseValue(text))
+
+# the document to build into: the open one inside Rhino, otherwise a new
+# headless document through rhinoinside
+def Document():
+    try:
+        import scriptcontext as sc
+        if sc.doc is not None:
+            return sc.doc
+    except ImportError:
+        pass
+    try:
+        import rhinoinside
+    except ImportError:
+        raise ValueError("building needs Rhino: run inside Rhino or install rhinoinside")
+    rhinoinside.load()
+    try:
+        import Rhino
+        import scriptcontext as sc
+    except ImportError:
+        raise ValueError("rhinoinside loaded no Rhino python modules, check the Rhino installation")
+    sc.doc = Rhino.RhinoDoc.CreateHeadless(None)
+    return sc.doc
+
+def Build(arguments):
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    Override(fireflyIceBlue, arguments.set)
+    parts = arguments.parts.split(",") if arguments.parts else None
+    for name in parts or []:
+        if name not in fireflyIceBlue.PARTS:
+            raise ValueError("unknown part " + name)
+    fireflyIceBlue.root = os.path.dirname(loader.ScriptPath("")) + os.sep
+    fireflyIceBlue.reportPath = ""
+    fireflyIceBlue.checkpointPath = os.path.abspath(arguments.checkpoints) if arguments.checkpoints else ""
+    # before loading Rhino, a mismatch with the board fails in a moment
+    fireflyIceBlue.Check()
+    document = Document()
+    detector = None
+    if arguments.leaks:
+        import leaks
+        detector = leaks.Leaks(arguments.leaks == "strict")
+        detector.Attach(fireflyIceBlue)
+    try:
+        if arguments.trace:
+            import tracing
+            tracing.TraceBuild(fireflyIceBlue, parts).Write(arguments.trace)
+            print("wrote " + arguments.trace)
+        else:
+            fireflyIceBlue.Create(parts)
+    finally:
+        if detector is not None:
+            detector.Detach(fireflyIceBlue)
+            print(leaks.Report(detector.leaks) or "no leaked objects")
+
+    output = arguments.output
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    fireflyIceBlue.report.Write(os.path.join(output, "build-report.json"))
+    formats = arguments.format.split(",") if arguments.format else []
+    if "3dm" in formats:
+        import Rhino
+        path = os.path.join(output, "firefly-ice-blue-core.3dm")
+        document.Write3dmFile(path, Rhino.FileIO.FileWriteOptions())
+        print("wrote " + path)
+    formats = [x for x in formats if x != "3dm"]
+    if formats:
+        import export
+        objects = dict((name, [fireflyIceBlue.Part(name)]) for name in parts or fireflyIceBlue.parts)
+        for path in export.ExportParts(output, objects, formats, level=arguments.level):
+            print("wrote " + path)
+    return 1 if fireflyIceBlue.report.Problems() else 0
+
+def Family(arguments):
+    Document()
+    import family
+    parts = arguments.parts.split(",") if arguments.parts else None
+    formats = arguments.format.split(",") if arguments.format else []
+    result = family.BuildFamily(arguments.path, parts)
+    for path in result.Write(arguments.output, formats, arguments.level):
+        print("wrote " + path)
+    problems = [x for fireflyIceBlue, objects in result.variants.values() for x in fireflyIceBlue.report.Problems()]
+    return 1 if problems else 0
+
+def Check(arguments):
+    import consistency
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    Override(fireflyIceBlue, arguments.set)
+    path = arguments.pcb or loader.ScriptPath(fireflyIceBlue.pcbPath)
+    problems = consistency.Check(fireflyIceBlue, path)
+    for problem in problems:
+        print("problem: " + problem)
+    if not problems:
+        print(os.path.basename(path) + " matches the enclosure parameters")
+    return 1 if problems else 0
+
+def Serve(arguments):
+    import daemon
+    daemon.Serve(arguments.port)
+    return 0
+
+def ShowParameters(arguments):
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    for name, value in sorted(Parameters(fireflyIceBlue).items()):
+        print("%-24s %r" % (name, value))
+    return 0
+
+def Report(arguments):
+    with open(arguments.path) as file:
+        report = json.load(file)
+    print(report["title"] + " " + report["started"])
+    for part in report["parts"]:
+        print("%-8s %10.2f mm3 %10.2f mm2 %8.1f s" % (part["name"], part["volume"] or 0, part["area"] or 0, part["buildTime"] or 0))
+    for problem in report["problems"]:
+        print("problem: " + problem)
+    return 1 if report["problems"] else 0
+
+def Compare(arguments):
+    import journal
+    differences = journal.Compare(journal.Read(arguments.golden), journal.Read(arguments.current))
+    print(journal.Report(differences) or "no differences")
+    return 1 if [x for x in differences if x[1] != "calls"] else 0
+
+def Parser():
+    parser = argparse.ArgumentParser(prog="firefly", description="Firefly Ice Blue enclosure builds")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    build = commands.add_parser("build", help="build parts headless and export them")
+    build.add_argument("--parts", help="comma separated parts, default top,spacer,shell,back")
+    build.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="override a parameter")
+    build.add_argument("--format", default="3dm", help="comma separated formats from " + ",".join(FORMATS))
+    build.add_argument("--output", default="build", help="output directory")
+    build.add_argument("--level", default="fine", help="tessellation level for mesh formats")
+    build.add_argument("--checkpoints", metavar="DIRECTORY", help="save finished parts and restore them on the next build with the same parameters")
+    build.add_argument("--trace", help="write a chrome trace of the build stages to this file")
+    build.add_argument("--leaks", choices=["report", "strict"], help="report objects each part leaves in the document, strict fails the build")
+    build.set_defaults(run=Build)
+
+    variants = commands.add_parser("family", help="build a family of variants, sharing identical parts")
+    variants.add_argument("path", help="json file with base parameters and variant overrides")
+    variants.add_argument("--parts", help="comma separated parts, default top,spacer,shell,back")
+    variants.add_argument("--format", default="3dm", help="comma separated formats from " + ",".join(FORMATS))
+    variants.add_argument("--output", default="variants", help="output directory, one directory per variant")
+    variants.add_argument("--level", default="fine", help="tessellation level for mesh formats")
+    variants.set_defaults(run=Family)
+
+    check = commands.add_parser("check", help="check the parameters against the board placement script")
+    check.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="override a parameter")
+    check.add_argument("--pcb", help="placement script, default the one named by pcbPath")
+    check.set_defaults(run=Check)
+
+    serve = commands.add_parser("serve", help="keep Rhino and the built parts warm and take build requests on a local socket")
+    serve.add_argument("--port", type=int, default=8737)
+    serve.set_defaults(run=Serve)
+
+    parameters = commands.add_parser("parameters", help="list the build parameters and their defaults")
+    parameters.set_defaults(run=ShowParameters)
+
+    report = commands.add_parser("report", help="summarize a build report")
+    report.add_argument("path")
+    report.set_defaults(run=Report)
+
+    compare = commands.add_parser("compare", help="compare a build journal with a golden one")
+    compare.add_argument("golden")
+    compare.add_argument("current")
+    compare.set_defaults(run=Compare)
+    return parser
+
+def Main(argv=None):
+    parser = Parser()
+    arguments = parser.parse_args(argv)
+    if arguments.command in ["build", "family"]:
+        for format in (arguments.format or "").split(","):
+            if format and format not in FORMATS:
+                parser.error("unknown format " + format)
+    try:
+        return arguments.run(arguments)
+    except ValueError as error:
+        parser.error(str(error))
+
+if __name__ == '__main__':
+    sys.exit(Main())
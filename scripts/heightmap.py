@@ -0,0 +1,224 @@
+import numpy as np
+import consistency
+import mesh
+import placement
+import stream
+import tessellation
+
+# component height map of a placed board for enclosure clearance checks
+#
+# the board is rasterized into two grids of cells, the highest component
+# point above the top copper side and the lowest below the bottom side, both
+# as a positive height from the board surface.  heights are in board
+# coordinates, the same as the placement script; the enclosure is centered on
+# consistency.CENTER.
+#
+# each package model is meshed once and reduced to a footprint: the highest
+# point in each small square of its own coordinates.  the footprint is then
+# rotated and mirrored once per distinct (package, rotate, mirror) of the
+# board, so placing an instance is a move and a np.maximum.at into the grid.
+# a placed package keeps its own z as the height from whichever side it is
+# on, since mirroring flips it under the board.
+#
+# Check compares the grids against the clearance of the enclosure parts over
+# each area of the board, in zones taken from the FireflyIceBlue parameters.
+
+SIDES = ["top", "bottom"]
+
+class HeightMap:
+
+    def __init__(self, x0, y0, columns, rows, cell):
+        self.x0 = x0
+        self.y0 = y0
+        self.columns = columns
+        self.rows = rows
+        self.cell = cell
+        self.grids = dict((side, np.zeros((rows, columns))) for side in SIDES)
+
+    def Cells(self, x, y):
+        column = np.floor((np.asarray(x) - self.x0) / self.cell).astype(np.int64)
+        row = np.floor((np.asarray(y) - self.y0) / self.cell).astype(np.int64)
+        return row, column
+
+    def Contains(self, row, column):
+        return (row >= 0) & (row < self.rows) & (column >= 0) & (column < self.columns)
+
+    # raise the cells under points to at least their heights
+    def Add(self, points, heights, side):
+        row, column = self.Cells(points[:, 0], points[:, 1])
+        inside = self.Contains(row, column)
+        np.maximum.at(self.grids[side], (row[inside], column[inside]), heights[inside])
+
+    # component height at a point, 0 off the board
+    def Height(self, x, y, side="top"):
+        row, column = self.Cells(x, y)
+        if not self.Contains(row, column):
+            return 0.0
+        return float(self.grids[side][row, column])
+
+    # boolean grid of the cells whose centers are inside a rectangle
+    def Mask(self, x0, y0, x1, y1):
+        xs = self.x0 + (np.arange(self.columns) + 0.5) * self.cell
+        ys = self.y0 + (np.arange(self.rows) + 0.5) * self.cell
+        return ((ys >= y0) & (ys <= y1))[:, None] & ((xs >= x0) & (xs <= x1))[None, :]
+
+    # (height, (x, y)) of the highest cell over a rectangle
+    def Maximum(self, x0, y0, x1, y1, side="top"):
+        heights = np.where(self.Mask(x0, y0, x1, y1), self.grids[side], 0.0)
+        row, column = np.unravel_index(np.argmax(heights), heights.shape)
+        return float(heights[row, column]), self.Center(row, column)
+
+    def Center(self, row, column):
+        return (self.x0 + (column + 0.5) * self.cell, self.y0 + (row + 0.5) * self.cell)
+
+# points on the triangles no further apart than step, in chunks of about
+# size points; the vertices come first
+def Samples(vertices, faces, step, size=1000000):
+    yield vertices
+    triangles = vertices[faces]
+    edges = np.linalg.norm(triangles - np.roll(triangles, 1, axis=1), axis=2).max(axis=1)
+    levels = np.maximum(np.ceil(edges / step).astype(np.int64), 1)
+    for level in np.unique(levels):
+        i, j = np.meshgrid(np.arange(level + 1), np.arange(level + 1))
+        keep = i + j <= level
+        u = i[keep] / float(level)
+        v = j[keep] / float(level)
+        selected = triangles[levels == level]
+        count = max(size // len(u), 1)
+        for first in range(0, len(selected), count):
+            t = selected[first:first + count]
+            points = t[:, None, 0] + u[None, :, None] * (t[:, None, 1] - t[:, None, 0]) + v[None, :, None] * (t[:, None, 2] - t[:, None, 0])
+            yield points.reshape(-1, 3)
+
+# (xy, z) of the highest point in each step x step square, at the square's
+# center
+def Footprint(vertices, faces, step):
+    keys = np.zeros((0, 2), np.int64)
+    heights = np.zeros(0)
+    # samples at half the square size so no square a triangle covers is missed
+    for points in Samples(vertices, faces, step / 2):
+        cells = np.floor(points[:, :2] / step).astype(np.int64)
+        keys, inverse = np.unique(np.concatenate([keys, cells]), axis=0, return_inverse=True)
+        merged = np.full(len(keys), -np.inf)
+        np.maximum.at(merged, inverse.ravel(), np.concatenate([heights, points[:, 2]]))
+        heights = merged
+    return (keys + 0.5) * step, heights
+
+# footprint xy in board orientation for a placement; z is unchanged
+def Orient(xy, rotate, mirror):
+    matrix = np.asarray(placement.Transform(0.0, 0.0, mirror, rotate, 0.0))
+    return xy.dot(matrix[:2, :2].T)
+
+class Builder:
+
+    def __init__(self, library, cell=0.1, level="coarse"):
+        self.library = library
+        self.cell = cell
+        self.level = level
+        self.footprints = {}
+        self.tiles = {}
+
+    def Footprint(self, name):
+        footprint = self.footprints.get(name)
+        if footprint is None:
+            parameters = tessellation.Tessellator().Parameters(self.level)
+            meshes = [mesh.FromGeometry(geometry, parameters) for geometry, color in self.library.Objects(name)]
+            vertices, faces = mesh.Combine(meshes)
+            footprint = Footprint(vertices, faces, self.cell / 2)
+            self.footprints[name] = footprint
+        return footprint
+
+    def Tile(self, name, rotate, mirror):
+        key = (name, rotate, bool(mirror))
+        tile = self.tiles.get(key)
+        if tile is None:
+            xy, z = self.Footprint(name)
+            above = z > 0
+            tile = (Orient(xy[above], rotate, mirror), z[above])
+            self.tiles[key] = tile
+        return tile
+
+    # height map of the PlaceInstance records of a placement script
+    def Build(self, path, margin=1.0):
+        placed = []
+        for number, name, arguments in placement.Records(path):
+            if name != "PlaceInstance" or not self.library.Exists(arguments[0]):
+                continue
+            file, x, y, mirror, rotate = arguments
+            xy, z = self.Tile(file, rotate, mirror)
+            if len(z):
+                placed.append((xy + (x, y), z, "bottom" if mirror else "top"))
+        if not placed:
+            return HeightMap(0.0, 0.0, 1, 1, self.cell)
+        lo = np.min([xy.min(axis=0) for xy, z, side in placed], axis=0) - margin
+        hi = np.max([xy.max(axis=0) for xy, z, side in placed], axis=0) + margin
+        columns, rows = np.ceil((hi - lo) / self.cell).astype(np.int64) + 1
+        heightMap = HeightMap(lo[0], lo[1], columns, rows, self.cell)
+        for xy, z, side in placed:
+            heightMap.Add(xy, z, side)
+        return heightMap
+
+def Build(path, cell=0.1, level="coarse"):
+    library = stream.Header(path)["library"]
+    return Builder(library, cell, level).Build(path)
+
+# (name, side, rectangle or None for the whole board, clearance) of the areas
+# under the enclosure parts; later zones replace earlier ones where they overlap
+def Zones(fireflyIceBlue):
+    f = fireflyIceBlue
+    cx, cy = consistency.CENTER
+    zones = [("spacer", "top", None, f.pcbTopClearance)]
+    # core-out in the spacer over the antenna, see CreateCoreSpacer
+    x = 19.558
+    y = 2.921
+    zones.append(("antenna core-out", "top", (x - 4.3 / 2, y - 2.2 / 2, x + 4.3 / 2, y + 2.2 / 2), f.pcbTopClearance + 0.2))
+    # the back below the board and the battery pocket in it, see CreateCoreBack
+    boardBottom = f.coreShellHeight - f.coreSpacerLedgeHeight - f.pcbTopClearance - f.pcbThickness
+    backTop = f.coreCoverSlopeHeight + f.coreCoverSpace + f.corePressHeight
+    zones.append(("back", "bottom", None, boardBottom - backTop))
+    xb = f.batteryHeight / 2
+    yb = (f.postPoints[0][1] - 17) - f.postMateOuterRadius - 0.2
+    # the pocket is cut batteryThickness + batterySwell below the board, so a
+    # swollen battery fills it up to the board and nothing may be placed over it
+    zones.append(("battery pocket", "bottom", (cx - xb, cy + yb - f.batteryWidth, cx + xb, cy + yb), 0.0))
+    return zones
+
+# components higher than the clearance of their zone, one entry per zone with
+# the highest point over it
+def Check(heightMap, fireflyIceBlue):
+    problems = []
+    for side in SIDES:
+        zones = [zone for zone in Zones(fireflyIceBlue) if zone[1] == side]
+        owner = np.full((heightMap.rows, heightMap.columns), -1)
+        for i, (name, s, rectangle, clearance) in enumerate(zones):
+            owner[heightMap.Mask(*rectangle) if rectangle else slice(None)] = i
+        heights = heightMap.grids[side]
+        for i, (name, s, rectangle, clearance) in enumerate(zones):
+            over = np.where((owner == i) & (heights > clearance), heights, 0.0)
+            if not over.any():
+                continue
+            row, column = np.unravel_index(np.argmax(over), over.shape)
+            problems.append({
+                "zone": name,
+                "side": side,
+                "height": float(over[row, column]),
+                "clearance": clearance,
+                "location": heightMap.Center(row, column),
+                "cells": int((over > 0).sum()),
+            })
+    return problems
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    import loader
+    path = rs.OpenFileName("Placement script", "Python scripts (*.py)|*.py||")
+    if path:
+        heightMap = Build(path)
+        for side in SIDES:
+            print("%s: highest component %.2f mm" % (side, heightMap.grids[side].max()))
+        problems = Check(heightMap, loader.FireflyIceBlue()())
+        for problem in problems:
+            x, y = problem["location"]
+            print("%s %s: %.2f mm over %.2f mm clearance at (%.2f, %.2f), %d cells" % (problem["side"], problem["zone"], problem["height"], problem["clearance"], x, y, problem["cells"]))
+        if not problems:
+            print("all components clear the enclosure")
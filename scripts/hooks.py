@@ -0,0 +1,49 @@
+# one wrapper around the public rhinoscriptsyntax functions, shared by the
+# listeners that record the calls a build makes
+#
+# the functions are wrapped when the first recorder is added and restored when
+# the last one is removed, so recorders can come and go in any order.  a
+# recorder has Recording(), false while it wants no calls, and
+# Called(name, args, kwargs, result).  calls rs makes on itself are part of
+# the outer call and are not reported.
+
+recorders = []
+originals = {}
+depth = 0
+
+def Add(recorder):
+    import rhinoscriptsyntax as rs
+    if not recorders:
+        for name in dir(rs):
+            function = getattr(rs, name)
+            if name[:1].isupper() and callable(function) and not isinstance(function, type):
+                originals[name] = function
+                setattr(rs, name, Wrap(name, function))
+    recorders.append(recorder)
+
+def Remove(recorder):
+    import rhinoscriptsyntax as rs
+    if recorder in recorders:
+        recorders.remove(recorder)
+    if not recorders:
+        for name, function in originals.items():
+            setattr(rs, name, function)
+        originals.clear()
+
+def Wrap(name, function):
+
+    def Call(*args, **kwargs):
+        global depth
+        active = [x for x in recorders if x.Recording()] if not depth else []
+        if not active:
+            return function(*args, **kwargs)
+        depth += 1
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            depth -= 1
+        for recorder in active:
+            recorder.Called(name, args, kwargs, result)
+        return result
+
+    return Call
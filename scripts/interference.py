@@ -0,0 +1,169 @@
+import numpy as np
+import mesh
+import tessellation
+from bvh import BVH
+
+# interference between parts of the assembly
+#
+# broad phase: part bounding boxes, then the two part BVHs are walked together
+# to find triangle pairs with overlapping boxes.  narrow phase: an exact
+# separating axis test on every candidate triangle pair.  for pairs that
+# intersect the penetration depth is the deepest vertex of either part that
+# lies inside the other.  faces that only touch (coplanar contact, such as pads
+# sitting on the board) do not count as interference.
+
+class Part:
+
+    def __init__(self, name, vertices, faces):
+        self.name = name
+        self.vertices = vertices
+        self.faces = faces
+        self.lo, self.hi = mesh.Bounds(vertices) if len(vertices) else (np.zeros(3), np.zeros(3))
+        self.bvh = BVH(vertices, faces)
+
+def BoxesOverlap(a, b, margin=0.0):
+    return bool(np.all(a.lo <= b.hi + margin) and np.all(b.lo <= a.hi + margin))
+
+def _Separated(axes, a, b, tolerance):
+    lengths = np.linalg.norm(axes, axis=2)
+    degenerate = lengths < 1e-12
+    lengths[degenerate] = 1
+    axes = axes / lengths[..., None]
+    pa = np.einsum('kav,kpv->kap', axes, a)
+    pb = np.einsum('kav,kpv->kap', axes, b)
+    separated = (pa.max(axis=2) <= pb.min(axis=2) + tolerance) | (pb.max(axis=2) <= pa.min(axis=2) + tolerance)
+    return (separated & ~degenerate).any(axis=1)
+
+# separating axis test between triangle arrays a and b of shape (k, 3, 3);
+# projections that only meet within tolerance count as separated, so
+# coplanar pairs (separated on their common normal) only ever touch
+def TrianglesIntersect(a, b, tolerance=1e-6):
+    result = np.zeros(len(a), bool)
+    # cheap rejections first: triangle boxes, then the two face planes
+    alive = np.nonzero(np.all(a.min(axis=1) < b.max(axis=1) - tolerance, axis=1) & np.all(b.min(axis=1) < a.max(axis=1) - tolerance, axis=1))[0]
+    a = a[alive]
+    b = b[alive]
+    ea = np.stack([a[:, 1] - a[:, 0], a[:, 2] - a[:, 1], a[:, 0] - a[:, 2]], axis=1)
+    eb = np.stack([b[:, 1] - b[:, 0], b[:, 2] - b[:, 1], b[:, 0] - b[:, 2]], axis=1)
+    normals = np.stack([np.cross(ea[:, 0], ea[:, 1]), np.cross(eb[:, 0], eb[:, 1])], axis=1)
+    keep = ~_Separated(normals, a, b, tolerance)
+    alive = alive[keep]
+    a = a[keep]
+    b = b[keep]
+    ea = ea[keep]
+    eb = eb[keep]
+    axes = np.stack([np.cross(ea[:, i], eb[:, j]) for i in range(3) for j in range(3)], axis=1)
+    result[alive[~_Separated(axes, a, b, tolerance)]] = True
+    return result
+
+# deepest vertex of either part inside the other, looking only at vertices
+# within the overlap of the two bounding boxes; large overlaps are estimated
+# from an evenly strided subset of the enclosed vertices
+def PenetrationDepth(a, b, lo, hi, samples=1024):
+    depth = 0.0
+    for inner, outer in [(a, b), (b, a)]:
+        candidates = inner.vertices[np.all((inner.vertices >= lo) & (inner.vertices <= hi), axis=1)]
+        if not len(candidates):
+            continue
+        inside = candidates[outer.bvh.Contains(candidates)]
+        if not len(inside):
+            continue
+        inside = inside[::max(1, len(inside) // samples)]
+        distance, hit, closest = outer.bvh.Nearest(inside)
+        depth = max(depth, float(distance.max()))
+    return depth
+
+# any vertex of the given faces strictly inside the other part; catches
+# crossings that land exactly on mesh edges, which the triangle test treats
+# as touching
+def _Inside(inner, faces, outer, tolerance):
+    vertices = inner.vertices[np.unique(inner.faces[faces])]
+    inside = vertices[outer.bvh.Contains(vertices)]
+    if not len(inside):
+        return False
+    # no surface within tolerance means the vertex is properly inside
+    distance, hit, closest = outer.bvh.Nearest(inside, tolerance)
+    return bool((hit < 0).any())
+
+def Result(a, b, triangles, contact, depth):
+    return {
+        "a": a.name,
+        "b": b.name,
+        "triangles": triangles,
+        "depth": depth,
+        "location": contact.mean(axis=0).tolist(),
+        "min": contact.min(axis=0).tolist(),
+        "max": contact.max(axis=0).tolist(),
+    }
+
+def Check(parts, tolerance=1e-6, chunk=200000):
+    results = []
+    for i in range(len(parts)):
+        for j in range(i + 1, len(parts)):
+            a = parts[i]
+            b = parts[j]
+            if not BoxesOverlap(a, b):
+                continue
+            fa, fb = a.bvh.Overlaps(b.bvh)
+            if not len(fa):
+                # no surfaces near each other, but one part may enclose the other
+                for inner, outer in [(a, b), (b, a)]:
+                    if outer.bvh.Contains(inner.vertices[:1]).any():
+                        results.append(Result(a, b, 0, inner.vertices, PenetrationDepth(a, b, np.maximum(a.lo, b.lo), np.minimum(a.hi, b.hi))))
+                        break
+                continue
+            hits = []
+            for k in range(0, len(fa), chunk):
+                ta = a.vertices[a.faces[fa[k:k + chunk]]]
+                tb = b.vertices[b.faces[fb[k:k + chunk]]]
+                hits.append(TrianglesIntersect(ta, tb, tolerance))
+            hits = np.concatenate(hits)
+            if not hits.any():
+                if not _Inside(a, np.unique(fa), b, tolerance) and not _Inside(b, np.unique(fb), a, tolerance):
+                    continue
+                hits = np.ones(len(fa), bool)
+            contact = np.concatenate([a.vertices[a.faces[fa[hits]]].reshape(-1, 3), b.vertices[b.faces[fb[hits]]].reshape(-1, 3)])
+            depth = PenetrationDepth(a, b, np.maximum(a.lo, b.lo), np.minimum(a.hi, b.hi))
+            results.append(Result(a, b, int(hits.sum()), contact, depth))
+    results.sort(key=lambda result: -result["depth"])
+    return results
+
+# every solid in the document: each named part layer is one part, objects on
+# any other layer (board, packages, pads) are parts of their own
+def DocumentParts(layers=["top", "spacer", "shell", "back", "clip"], level="medium"):
+    import rhinoscriptsyntax as rs
+    parts = []
+    for layer in rs.LayerNames():
+        objects = [x for x in (rs.ObjectsByLayer(layer) or []) if mesh.IsSolid(x)]
+        if not objects:
+            continue
+        if layer in layers:
+            vertices, faces = tessellation.Combined(objects, level)
+            parts.append(Part(layer, vertices, faces))
+        else:
+            for object in objects:
+                name = rs.ObjectName(object) or (rs.BlockInstanceName(object) if rs.IsBlockInstance(object) else None) or str(object)
+                vertices, faces = tessellation.Mesh(object, level)
+                parts.append(Part(layer + "/" + name, vertices, faces))
+    return parts
+
+def CheckDocument(tolerance=1e-6, level="medium"):
+    return Check(DocumentParts(level=level), tolerance)
+
+def Show(results, layer="interference"):
+    import rhinoscriptsyntax as rs
+    rs.AddLayer(layer, 0xff0000)
+    dots = []
+    for result in results:
+        dots.append(rs.AddTextDot("%s / %s %.3f" % (result["a"], result["b"], result["depth"]), result["location"]))
+    if dots:
+        rs.ObjectLayer(dots, layer)
+    return dots
+
+if __name__ == '__main__':
+    results = CheckDocument()
+    for result in results:
+        print("%s intersects %s: %d triangles, depth %.3f mm" % (result["a"], result["b"], result["triangles"], result["depth"]))
+    if not results:
+        print("no interference")
+    Show(results)
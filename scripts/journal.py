@@ -0,0 +1,208 @@
+import json
+import os
+import sys
+import hooks
+
+# journal of the rhinoscriptsyntax calls made by a build
+#
+# Install() records every public rs function call, through hooks, with its
+# arguments under the current stage.  object ids are replaced by the order in
+# which the build created them, so two builds of the same parts produce the
+# same journal.  at the end of each stage the bounding box, area and volume of
+# the stage result are recorded.  Compare() checks a journal against a golden
+# one and says which stages changed geometry or call counts.
+
+class Journal:
+
+    def __init__(self):
+        self.stages = []
+        self.stack = []
+        self.ids = {}
+        self.depth = 0
+
+    def Install(self):
+        hooks.Add(self)
+
+    def Uninstall(self):
+        hooks.Remove(self)
+
+    def Recording(self):
+        return bool(self.stack) and not self.depth
+
+    def Called(self, name, args, kwargs, result):
+        self.Record(name, args, kwargs, result)
+
+    def Normalize(self, value):
+        if value is None or isinstance(value, (bool, int)):
+            return value
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [self.Normalize(x) for x in value]
+        if isinstance(value, dict):
+            return dict((str(k), self.Normalize(v)) for k, v in value.items())
+        key = str(value)
+        if key in self.ids:
+            return "#%d" % self.ids[key]
+        if hasattr(value, "X") and hasattr(value, "Y") and hasattr(value, "Z"):
+            return [round(value.X, 6), round(value.Y, 6), round(value.Z, 6)]
+        return type(value).__name__
+
+    def Created(self, result):
+        if isinstance(result, (list, tuple)):
+            for x in result:
+                self.Created(x)
+        elif type(result).__name__ == "Guid":
+            key = str(result)
+            if key not in self.ids:
+                self.ids[key] = len(self.ids)
+                self.stack[-1]["created"].append(result)
+
+    def Record(self, name, args, kwargs, result):
+        arguments = self.Normalize(list(args))
+        if kwargs:
+            arguments.append(self.Normalize(kwargs))
+        self.Created(result)
+        for stage in self.stack:
+            stage["counts"][name] = stage["counts"].get(name, 0) + 1
+        self.stack[-1]["calls"].append([name, arguments, self.Normalize(result)])
+
+    def BeginStage(self, name):
+        stage = {"name": "/".join([x["name"] for x in self.stack] + [name]), "calls": [], "counts": {}, "created": []}
+        self.stack.append(stage)
+
+    # result is the object the stage built; stages without one are summarized
+    # over the objects they created that still exist
+    def EndStage(self, name, result=None):
+        stage = self.stack.pop()
+        created = stage.pop("created")
+        if self.stack:
+            self.stack[-1]["created"].extend(created)
+        objects = [result] if result is not None else created
+        stage["metrics"] = self.Metrics(objects)
+        self.stages.append(stage)
+
+    def Metrics(self, objects):
+        import rhinoscriptsyntax as rs
+        # the measuring calls are not part of the build
+        self.depth += 1
+        try:
+            objects = [x for x in objects if rs.IsObject(x)]
+            solids = [x for x in objects if rs.IsPolysurface(x) or rs.IsSurface(x)]
+            metrics = {"objects": len(objects)}
+            if objects:
+                box = rs.BoundingBox(objects)
+                metrics["min"] = [round(x, 6) for x in box[0]]
+                metrics["max"] = [round(x, 6) for x in box[6]]
+            if solids:
+                metrics["area"] = sum(rs.SurfaceArea(x)[0] for x in solids)
+                closed = [x for x in solids if rs.IsPolysurfaceClosed(x)]
+                metrics["volume"] = sum(rs.SurfaceVolume(x)[0] for x in closed) if closed else 0.0
+            return metrics
+        finally:
+            self.depth -= 1
+
+    def ToDict(self):
+        return {"stages": self.stages}
+
+    def Write(self, path):
+        with open(path, "w") as file:
+            json.dump(self.ToDict(), file, indent=1, sort_keys=True)
+
+def Read(path):
+    with open(path) as file:
+        return json.load(file)
+
+TOLERANCES = {"length": 1e-3, "area": 1e-4, "volume": 1e-4}
+
+# differences between a golden journal and a new one, as (stage, kind, text)
+# where kind is "geometry", "calls" or "stage"
+def Compare(golden, current, tolerances=TOLERANCES):
+    differences = []
+    old = dict((x["name"], x) for x in golden["stages"])
+    new = dict((x["name"], x) for x in current["stages"])
+    for name in [x["name"] for x in golden["stages"]]:
+        if name not in new:
+            differences.append((name, "stage", "missing"))
+    for stage in current["stages"]:
+        name = stage["name"]
+        if name not in old:
+            differences.append((name, "stage", "new"))
+            continue
+        a = old[name]["metrics"]
+        b = stage["metrics"]
+        if a.get("objects") != b.get("objects"):
+            differences.append((name, "geometry", "objects %s -> %s" % (a.get("objects"), b.get("objects"))))
+        for key in ["min", "max"]:
+            if (key in a) != (key in b) or (key in a and max(abs(x - y) for x, y in zip(a[key], b[key])) > tolerances["length"]):
+                differences.append((name, "geometry", "%s %s -> %s" % (key, a.get(key), b.get(key))))
+        for key in ["area", "volume"]:
+            x = a.get(key)
+            y = b.get(key)
+            if (x is None) != (y is None) or (x is not None and abs(x - y) > tolerances[key] * max(abs(x), 1.0)):
+                differences.append((name, "geometry", "%s %s -> %s" % (key, x, y)))
+        counts = set(old[name]["counts"]) | set(stage["counts"])
+        for function in sorted(counts):
+            x = old[name]["counts"].get(function, 0)
+            y = stage["counts"].get(function, 0)
+            if x != y:
+                differences.append((name, "calls", "%s %d -> %d" % (function, x, y)))
+    return differences
+
+# build the enclosure parts with the journal installed
+def RecordBuild(fireflyIceBlue):
+    journal = Journal()
+    fireflyIceBlue.listeners.append(journal)
+    journal.Install()
+    try:
+        fireflyIceBlue.Create()
+    finally:
+        journal.Uninstall()
+        fireflyIceBlue.listeners.remove(journal)
+    return journal
+
+# run a board placement script as a single stage
+def RecordScript(path):
+    journal = Journal()
+    journal.Install()
+    name = os.path.splitext(os.path.basename(path))[0]
+    journal.BeginStage(name)
+    try:
+        with open(path) as file:
+            code = compile(file.read(), path, "exec")
+        exec(code, {"__name__": "__main__", "__file__": path})
+    finally:
+        journal.EndStage(name)
+        journal.Uninstall()
+    return journal
+
+# compare a new journal against the golden one at path, or store it as the
+# golden one when there is none yet; returns the differences
+def Check(journal, path):
+    if not os.path.exists(path):
+        journal.Write(path)
+        return []
+    return Compare(Read(path), journal.ToDict())
+
+def Report(differences):
+    lines = []
+    for stage, kind, text in differences:
+        lines.append("%-20s %-8s %s" % (stage, kind, text))
+    return "\n".join(lines)
+
+if __name__ == '__main__':
+    import loader
+    root = os.path.dirname(os.path.abspath(__file__))
+    golden = os.path.join(root, "golden")
+    if not os.path.isdir(golden):
+        os.makedirs(golden)
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    fireflyIceBlue.root = root + os.sep
+    differences = Check(RecordBuild(fireflyIceBlue), os.path.join(golden, "firefly-ice-blue-core.json"))
+    path = os.path.join(root, "firefly-ice-blue-pcb.py")
+    differences += Check(RecordScript(path), os.path.join(golden, "firefly-ice-blue-pcb.json"))
+    print(Report(differences) or "no differences")
+    if [x for x in differences if x[1] != "calls"]:
+        sys.exit(1)
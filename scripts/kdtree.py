@@ -0,0 +1,157 @@
+import numpy as np
+
+# kd-tree over a point cloud
+#
+# built and stored like the BVH: flat node arrays, a leaf covers
+# points[start:start + count] of the reordered points and every node keeps the
+# tight bounding box of its points.  Query takes a whole batch of points.
+
+class KDTree:
+
+    def __init__(self, points, leafSize=32):
+        points = np.asarray(points, np.float64)
+        order = np.arange(len(points))
+
+        nodeMin = []
+        nodeMax = []
+        nodeStart = []
+        nodeCount = []
+        nodeLeft = []
+        nodeRight = []
+
+        def AddNode(start, end):
+            p = points[order[start:end]]
+            nodeMin.append(p.min(axis=0))
+            nodeMax.append(p.max(axis=0))
+            nodeStart.append(start)
+            nodeCount.append(end - start)
+            nodeLeft.append(-1)
+            nodeRight.append(-1)
+            return len(nodeMin) - 1
+
+        stack = [AddNode(0, len(points))] if len(points) else []
+        while stack:
+            node = stack.pop()
+            start = nodeStart[node]
+            end = start + nodeCount[node]
+            if end - start <= leafSize:
+                continue
+            # median split along the longest side of the node box
+            span = order[start:end]
+            axis = np.argmax(nodeMax[node] - nodeMin[node])
+            half = (end - start) // 2
+            split = np.argpartition(points[span, axis], half)
+            order[start:end] = span[split]
+            nodeCount[node] = 0
+            nodeLeft[node] = AddNode(start, start + half)
+            nodeRight[node] = AddNode(start + half, end)
+            stack.append(nodeLeft[node])
+            stack.append(nodeRight[node])
+
+        self.nodeMin = np.array(nodeMin).reshape(-1, 3)
+        self.nodeMax = np.array(nodeMax).reshape(-1, 3)
+        self.nodeStart = np.array(nodeStart, np.int64)
+        self.nodeCount = np.array(nodeCount, np.int64)
+        self.nodeLeft = np.array(nodeLeft, np.int64)
+        self.nodeRight = np.array(nodeRight, np.int64)
+        # original index of each reordered point
+        self.index = order
+        self.points = points[order]
+        self.leaves = None
+
+    def __len__(self):
+        return len(self.index)
+
+    # reordered points of every leaf padded to the same length with inf, so
+    # one fancy index gives the points of a leaf for each of many queries
+    def Leaves(self):
+        if self.leaves is None:
+            leaves = np.nonzero(self.nodeCount)[0]
+            slot = np.full(len(self.nodeCount), -1, np.int64)
+            slot[leaves] = np.arange(len(leaves))
+            padded = np.full((len(leaves), self.nodeCount.max(), 3), np.inf)
+            for j in range(padded.shape[1]):
+                full = self.nodeCount[leaves] > j
+                padded[full, j] = self.points[self.nodeStart[leaves[full]] + j]
+            self.leaves = (slot, padded)
+        return self.leaves
+
+    # nearest point among the leaf points of each (query, leaf) pair
+    def _Closest(self, queries, nodes, chunk=50000):
+        slot, padded = self.Leaves()
+        distance = np.empty(len(queries))
+        index = np.empty(len(queries), np.int64)
+        for start in range(0, len(queries), chunk):
+            q = queries[start:start + chunk]
+            n = nodes[start:start + chunk]
+            d = ((q[:, None] - padded[slot[n]]) ** 2).sum(axis=2)
+            nearest = np.argmin(d, axis=1)
+            distance[start:start + chunk] = d[np.arange(len(n)), nearest]
+            index[start:start + chunk] = self.nodeStart[n] + nearest
+        return distance, index
+
+    # distance to and original index of the nearest point for each query,
+    # inf and -1 when nothing is within maximumDistance
+    #
+    # each query first descends to the leaf nearest to it, which gives a
+    # tight bound; then all (query, node) pairs within the bound are expanded
+    # a level at a time, so the work is a few numpy calls per tree level
+    # instead of per node
+    def Query(self, queries, maximumDistance=np.inf):
+        queries = np.asarray(queries, np.float64)
+        best = np.full(len(queries), maximumDistance * maximumDistance)
+        hit = np.full(len(queries), -1, np.int64)
+        if not len(self) or not len(queries):
+            return np.full(len(queries), np.inf), hit
+        center = (self.nodeMin + self.nodeMax) * 0.5
+
+        node = np.zeros(len(queries), np.int64)
+        interior = np.nonzero(self.nodeCount[node] == 0)[0]
+        while len(interior):
+            q = queries[interior]
+            left = self.nodeLeft[node[interior]]
+            right = self.nodeRight[node[interior]]
+            nearer = ((q - center[left]) ** 2).sum(axis=1) <= ((q - center[right]) ** 2).sum(axis=1)
+            node[interior] = np.where(nearer, left, right)
+            interior = interior[self.nodeCount[node[interior]] == 0]
+        d, index = self._Closest(queries, node)
+        better = d <= best
+        best[better] = d[better]
+        hit[better] = index[better]
+        seed = node
+
+        pairQuery = np.arange(len(queries))
+        pairNode = np.zeros(len(queries), np.int64)
+        leafQuery = []
+        leafNode = []
+        while len(pairQuery):
+            q = queries[pairQuery]
+            gap = np.maximum(np.maximum(self.nodeMin[pairNode] - q, q - self.nodeMax[pairNode]), 0)
+            keep = (gap * gap).sum(axis=1) < best[pairQuery]
+            pairQuery = pairQuery[keep]
+            pairNode = pairNode[keep]
+            leaf = self.nodeCount[pairNode] > 0
+            # the leaf each query descended to is already done
+            done = leaf & (pairNode == seed[pairQuery])
+            leafQuery.append(pairQuery[leaf & ~done])
+            leafNode.append(pairNode[leaf & ~done])
+            pairQuery = np.repeat(pairQuery[~leaf], 2)
+            pairNode = np.stack([self.nodeLeft[pairNode[~leaf]], self.nodeRight[pairNode[~leaf]]], axis=1).ravel()
+
+        pairQuery = np.concatenate(leafQuery)
+        pairNode = np.concatenate(leafNode)
+        if len(pairQuery):
+            d, index = self._Closest(queries[pairQuery], pairNode)
+            # smallest distance per query: sort by query then distance and keep
+            # the first pair of each query
+            order = np.lexsort((d, pairQuery))
+            first = np.ones(len(order), bool)
+            first[1:] = pairQuery[order][1:] != pairQuery[order][:-1]
+            order = order[first]
+            better = d[order] < best[pairQuery[order]]
+            best[pairQuery[order][better]] = d[order][better]
+            hit[pairQuery[order][better]] = index[order][better]
+        distance = np.sqrt(best)
+        distance[hit < 0] = np.inf
+        hit[hit >= 0] = self.index[hit[hit >= 0]]
+        return distance, hit
@@ -0,0 +1,96 @@
+import os
+import traceback
+import hooks
+
+# detector for the objects a FireflyIceBlue build leaves in the document
+#
+# a Leaks listener takes the document object ids when a part starts and again
+# when it ends: anything new that is not the part itself was made by a helper
+# and never consumed, and every one of them slows down the boolean operations
+# after it and ends up in the saved file.  while attached, every
+# rhinoscriptsyntax call that returns new ids records where in the build
+# scripts it was made and in which step, so a leak is reported with its call
+# site.  in strict mode the first part with leaks stops the build.
+
+class Leaks:
+
+    def __init__(self, strict=False):
+        self.strict = strict
+        # (stage name, ids before the part or None inside it)
+        self.stack = []
+        # id: (stage, call site)
+        self.sites = {}
+        # {"part", "id", "stage", "site"}
+        self.leaks = []
+
+    def Attach(self, fireflyIceBlue):
+        hooks.Add(self)
+        fireflyIceBlue.listeners.append(self)
+
+    def Detach(self, fireflyIceBlue):
+        hooks.Remove(self)
+        if self in fireflyIceBlue.listeners:
+            fireflyIceBlue.listeners.remove(self)
+
+    def Recording(self):
+        return bool(self.stack)
+
+    def Called(self, name, args, kwargs, result):
+        self.Created(name, result)
+
+    def Created(self, name, result):
+        if isinstance(result, (list, tuple)):
+            for x in result:
+                self.Created(name, x)
+        elif type(result).__name__ == "Guid" and str(result) not in self.sites:
+            stage = "/".join(x[0] for x in self.stack)
+            self.sites[str(result)] = (stage, Site(name))
+
+    def Ids(self):
+        import scriptcontext as sc
+        return set(str(x.Id) for x in sc.doc.Objects)
+
+    def BeginStage(self, name):
+        self.stack.append((name, None if self.stack else self.Ids()))
+
+    def EndStage(self, name, result=None):
+        name, before = self.stack.pop()
+        if before is None:
+            return
+        found = []
+        for id in sorted(self.Ids() - before - set([str(result)])):
+            stage, site = self.sites.get(id, (name, "unknown call"))
+            found.append({"part": name, "id": id, "stage": stage, "site": site})
+        self.leaks += found
+        if found and self.strict:
+            raise ValueError(name + " leaves objects in the document:\n" + Report(found))
+
+# where the build scripts made an rs call: the innermost frame outside
+# rhinoscriptsyntax, hooks and this file
+def Site(name):
+    skip = [os.path.splitext(os.path.abspath(x))[0] for x in [__file__, hooks.__file__]]
+    for filename, line, function, text in reversed(traceback.extract_stack()):
+        if os.path.splitext(os.path.abspath(filename))[0] in skip or "rhinoscript" in filename:
+            continue
+        return "rs.%s in %s, %s:%d" % (name, function, os.path.basename(filename), line)
+    return "rs." + name
+
+def Report(leaks):
+    return "\n".join("%s: %s from %s (%s)" % (x["stage"], x["id"], x["site"], x["part"]) for x in leaks)
+
+# build the enclosure parts and report what each part leaves behind
+def CheckBuild(fireflyIceBlue, parts=None, strict=False):
+    leaks = Leaks(strict)
+    leaks.Attach(fireflyIceBlue)
+    try:
+        fireflyIceBlue.Create(parts)
+    finally:
+        leaks.Detach(fireflyIceBlue)
+    return leaks.leaks
+
+if __name__ == '__main__':
+    import loader
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    fireflyIceBlue.root = os.path.dirname(os.path.abspath(__file__)) + os.sep
+    found = CheckBuild(fireflyIceBlue)
+    print(Report(found) or "no leaked objects")
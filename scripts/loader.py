@@ -0,0 +1,52 @@
+import os
+
+# the build scripts have dashes in their names and cannot be imported
+# directly; this loads one as a module, once, by path, and reads and sets the
+# parameters of the build object it defines
+
+modules = {}
+
+def LoadScript(path):
+    path = os.path.abspath(path)
+    module = modules.get(path)
+    if module is not None:
+        return module
+    name = os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except ImportError:
+        import imp
+        module = imp.load_source(name, path)
+    modules[path] = module
+    return module
+
+def ScriptPath(name):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+def FireflyIceBlue():
+    return LoadScript(ScriptPath("firefly-ice-blue-core.py")).FireflyIceBlue
+
+# the numeric, boolean and point list attributes of a fresh build object
+def Parameters(fireflyIceBlue):
+    parameters = {}
+    for name, value in vars(fireflyIceBlue).items():
+        if isinstance(value, (bool, int, float, list, tuple)) and name not in ["parts", "listeners"]:
+            parameters[name] = value
+    return parameters
+
+# set one parameter, the value type must match the current one
+def SetParameter(fireflyIceBlue, name, value):
+    parameters = Parameters(fireflyIceBlue)
+    if name not in parameters:
+        raise ValueError("unknown parameter " + name)
+    old = parameters[name]
+    if isinstance(old, bool) != isinstance(value, bool):
+        raise ValueError("%s is %r, not %r" % (name, old, value))
+    if isinstance(old, float) and isinstance(value, int):
+        value = float(value)
+    if not isinstance(value, type(old)) and not (isinstance(old, (list, tuple)) and isinstance(value, (list, tuple))):
+        raise ValueError("%s is %r, not %r" % (name, old, value))
+    setattr(fireflyIceBlue, name, value)
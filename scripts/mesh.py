@@ -0,0 +1,129 @@
+import numpy as np
+
+# triangle meshes are passed around as plain arrays so the analysis code runs
+# without Rhino: vertices is (n, 3) float64 and faces is (m, 3) int64
+
+def FromRhinoMesh(rhinoMesh):
+    rhinoMesh = rhinoMesh.DuplicateMesh()
+    rhinoMesh.Faces.ConvertQuadsToTriangles()
+    vertices = np.fromiter(rhinoMesh.Vertices.ToFloatArray(), np.float64).reshape(-1, 3)
+    faces = np.fromiter(rhinoMesh.Faces.ToIntArray(True), np.int64).reshape(-1, 3)
+    return vertices, faces
+
+def MeshingParameters(chord=0.01, angle=10.0, maximumEdge=0.0):
+    import Rhino
+    parameters = Rhino.Geometry.MeshingParameters()
+    parameters.Tolerance = chord
+    parameters.RelativeTolerance = 0.0
+    parameters.MinimumTolerance = 0.0
+    parameters.RefineGrid = True
+    parameters.SimplePlanes = False
+    parameters.JaggedSeams = False
+    parameters.RefineAngle = angle * (np.pi / 180)
+    parameters.MaximumEdgeLength = maximumEdge
+    return parameters
+
+def FromGeometry(geometry, parameters=None):
+    import Rhino
+    if parameters is None:
+        parameters = MeshingParameters()
+    if isinstance(geometry, Rhino.Geometry.Mesh):
+        return FromRhinoMesh(geometry)
+    if isinstance(geometry, Rhino.Geometry.Extrusion):
+        geometry = geometry.ToBrep()
+    joined = Rhino.Geometry.Mesh()
+    for piece in Rhino.Geometry.Mesh.CreateFromBrep(geometry, parameters):
+        joined.Append(piece)
+    # merge the duplicate vertices along brep edges so closed parts mesh closed
+    joined.Vertices.CombineIdentical(True, True)
+    return FromRhinoMesh(joined)
+
+def FromObject(object, parameters=None):
+    import rhinoscriptsyntax as rs
+    if rs.IsBlockInstance(object):
+        # placed packages are block instances, mesh the definition in place
+        xform = rs.BlockInstanceXform(object)
+        m = np.array([[xform[i, j] for j in range(4)] for i in range(4)])
+        meshes = []
+        for x in rs.BlockObjects(rs.BlockInstanceName(object)):
+            if IsSolid(x):
+                vertices, faces = FromObject(x, parameters)
+                meshes.append((vertices.dot(m[:3, :3].T) + m[:3, 3], faces))
+        return Combine(meshes)
+    return FromGeometry(rs.coercegeometry(object), parameters)
+
+def IsSolid(object):
+    import rhinoscriptsyntax as rs
+    return rs.IsPolysurface(object) or rs.IsSurface(object) or rs.IsMesh(object) or rs.IsBlockInstance(object)
+
+def FromLayer(layer, parameters=None):
+    import rhinoscriptsyntax as rs
+    objects = [x for x in rs.ObjectsByLayer(layer) if IsSolid(x)]
+    return Combine([FromObject(x, parameters) for x in objects])
+
+# content hash of the geometry of a document object, independent of its id,
+# layer and attributes
+def GeometryHash(object):
+    import hashlib
+    import rhinoscriptsyntax as rs
+    geometry = rs.coercegeometry(object)
+    digest = hashlib.sha1()
+    digest.update(geometry.GetType().Name.encode())
+    try:
+        digest.update(geometry.ToJSON(None).encode())
+    except AttributeError:
+        # older RhinoCommon without json serialization, hash a fine mesh
+        vertices, faces = FromGeometry(geometry, MeshingParameters(0.001))
+        digest.update(np.ascontiguousarray(vertices).tobytes())
+        digest.update(np.ascontiguousarray(faces).tobytes())
+    return digest.hexdigest()
+
+def Combine(meshes):
+    vertices = []
+    faces = []
+    offset = 0
+    for v, f in meshes:
+        vertices.append(v)
+        faces.append(f + offset)
+        offset += len(v)
+    if not vertices:
+        return np.zeros((0, 3)), np.zeros((0, 3), np.int64)
+    return np.concatenate(vertices), np.concatenate(faces)
+
+def Triangles(vertices, faces):
+    return vertices[faces]
+
+def TriangleNormals(vertices, faces):
+    triangles = vertices[faces]
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    return normals / lengths[:, None]
+
+def TriangleAreas(vertices, faces):
+    triangles = vertices[faces]
+    return 0.5 * np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+
+def SurfaceArea(vertices, faces):
+    return TriangleAreas(vertices, faces).sum()
+
+def Bounds(vertices):
+    return vertices.min(axis=0), vertices.max(axis=0)
+
+# area weighted random points on the surface, returned with the normal and
+# index of the triangle each point was sampled from
+def SampleSurface(vertices, faces, count, seed=0):
+    random = np.random.default_rng(seed)
+    areas = TriangleAreas(vertices, faces)
+    cumulative = np.cumsum(areas)
+    index = np.searchsorted(cumulative, random.random(count) * cumulative[-1], side='right')
+    index = np.minimum(index, len(faces) - 1)
+    u = random.random(count)
+    v = random.random(count)
+    flip = u + v > 1
+    u[flip] = 1 - u[flip]
+    v[flip] = 1 - v[flip]
+    triangles = vertices[faces[index]]
+    points = triangles[:, 0] + u[:, None] * (triangles[:, 1] - triangles[:, 0]) + v[:, None] * (triangles[:, 2] - triangles[:, 0])
+    normals = TriangleNormals(vertices, faces)[index]
+    return points, normals, index
@@ -0,0 +1,146 @@
+import json
+import time
+
+# machine readable metrics of the parts of a build
+#
+# every metric is computed on first use and memoized per part, so a report can
+# be summarized, written and queried without going back to the geometry.
+
+# g/mm^3
+DENSITIES = {
+    "abs": 0.00104,
+    "pc": 0.00120,
+    "pla": 0.00124,
+    "tpu": 0.00121,
+}
+
+class PartMetrics:
+
+    def __init__(self, name, object, density):
+        self.name = name
+        self.object = object
+        self.density = density
+        self.buildTime = None
+        self.cache = {}
+
+    def Memo(self, key, compute):
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def Closed(self):
+        import rhinoscriptsyntax as rs
+        return self.Memo("closed", lambda: bool(rs.IsPolysurfaceClosed(self.object)))
+
+    def Valid(self):
+        import rhinoscriptsyntax as rs
+        return self.Memo("valid", lambda: bool(rs.IsObjectValid(self.object)))
+
+    def Volume(self):
+        import rhinoscriptsyntax as rs
+
+        def Compute():
+            if not self.Closed():
+                return None
+            volume = rs.SurfaceVolume(self.object)
+            return volume[0] if volume else None
+
+        return self.Memo("volume", Compute)
+
+    def Mass(self):
+        volume = self.Volume()
+        return None if volume is None else volume * self.density
+
+    def Area(self):
+        import rhinoscriptsyntax as rs
+
+        def Compute():
+            area = rs.SurfaceArea(self.object)
+            return area[0] if area else None
+
+        return self.Memo("area", Compute)
+
+    def BoundingBox(self):
+        import rhinoscriptsyntax as rs
+
+        def Compute():
+            box = rs.BoundingBox(self.object)
+            return [list(box[0]), list(box[6])]
+
+        return self.Memo("box", Compute)
+
+    def ToDict(self):
+        return {
+            "name": self.name,
+            "closed": self.Closed(),
+            "valid": self.Valid(),
+            "volume": self.Volume(),
+            "mass": self.Mass(),
+            "density": self.density,
+            "area": self.Area(),
+            "min": self.BoundingBox()[0],
+            "max": self.BoundingBox()[1],
+            "buildTime": self.buildTime,
+        }
+
+class BuildReport:
+
+    def __init__(self, title=""):
+        self.title = title
+        self.started = time.time()
+        self.parts = []
+
+    def Part(self, name):
+        for part in self.parts:
+            if part.name == name:
+                return part
+        return None
+
+    def Add(self, name, object, density):
+        part = self.Part(name)
+        if part is not None:
+            self.parts.remove(part)
+        part = PartMetrics(name, object, density)
+        self.parts.append(part)
+        return part
+
+    def SetBuildTime(self, name, seconds):
+        part = self.Part(name)
+        if part is not None:
+            part.buildTime = seconds
+
+    def Problems(self):
+        problems = []
+        for part in self.parts:
+            if not part.Closed():
+                problems.append(part.name + " is not a closed polysurface")
+            if not part.Valid():
+                problems.append(part.name + " is not valid")
+        return problems
+
+    def ToDict(self):
+        return {
+            "title": self.title,
+            "started": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            "elapsed": time.time() - self.started,
+            "parts": [part.ToDict() for part in self.parts],
+            "problems": self.Problems(),
+        }
+
+    def Write(self, path):
+        with open(path, "w") as file:
+            json.dump(self.ToDict(), file, indent=1, sort_keys=True)
+
+    def Summary(self):
+        lines = []
+        for part in self.parts:
+            volume = part.Volume()
+            mass = part.Mass()
+            lines.append("%-8s %s %10s mm3 %8s g %8.1f s" % (
+                part.name,
+                "closed" if part.Closed() else "OPEN  ",
+                "-" if volume is None else "%.2f" % volume,
+                "-" if mass is None else "%.3f" % mass,
+                part.buildTime or 0.0))
+        lines.extend(self.Problems())
+        return "\n".join(lines)
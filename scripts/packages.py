@@ -0,0 +1,82 @@
+import os
+import threading
+import reader
+
+# library of package models for the board placement scripts
+#
+# each package .3dm is read in memory once per session and turned into a
+# block definition named after the package; placing a package adds an
+# instance of that block.  libraries are kept in scriptcontext.sticky by
+# directory so repeated runs reuse the parsed files.
+#
+# Prefetch starts reading a list of packages on background threads; the main
+# thread only waits when it places a package whose read is still running.
+
+KEY = "firefly.packages"
+
+class PackageLibrary:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.objects = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def Path(self, name):
+        return os.path.join(self.directory, name + ".3dm")
+
+    def Exists(self, name):
+        return name in self.objects or name in self.pending or os.path.exists(self.Path(name))
+
+    def Prefetch(self, names, threads=4):
+        with self.lock:
+            names = [x for x in names if x not in self.objects and x not in self.pending and os.path.exists(self.Path(x))]
+            reads = reader.ReadInBackground([self.Path(x) for x in names], threads)
+            for name, read in zip(names, reads):
+                self.pending[name] = read
+
+    # (geometry, color) pairs of the package model
+    def Objects(self, name):
+        objects = self.objects.get(name)
+        if objects is None:
+            with self.lock:
+                read = self.pending.pop(name, None)
+            objects = read.Result() if read is not None else reader.ReadObjects(self.Path(name))
+            self.objects[name] = objects
+        return objects
+
+    # index of the document block definition for a package, created on first use
+    def Definition(self, name):
+        import scriptcontext as sc
+        import Rhino
+        definition = sc.doc.InstanceDefinitions.Find(name)
+        if definition is not None and not definition.IsDeleted:
+            return definition.Index
+        objects = self.Objects(name)
+        geometry = [g.Duplicate() for g, color in objects]
+        attributes = [reader.Attributes(color) for g, color in objects]
+        return sc.doc.InstanceDefinitions.Add(name, "", Rhino.Geometry.Point3d.Origin, geometry, attributes)
+
+    # add an instance of the package, None when there is no model for it
+    def Insert(self, name, xform=None, attributes=None):
+        import scriptcontext as sc
+        import Rhino
+        if not self.Exists(name):
+            return None
+        if xform is None:
+            xform = Rhino.Geometry.Transform.Identity
+        if attributes is None:
+            return sc.doc.Objects.AddInstanceObject(self.Definition(name), xform)
+        return sc.doc.Objects.AddInstanceObject(self.Definition(name), xform, attributes)
+
+def Library(directory):
+    import scriptcontext as sc
+    libraries = sc.sticky.get(KEY)
+    if libraries is None:
+        libraries = {}
+        sc.sticky[KEY] = libraries
+    library = libraries.get(directory)
+    if library is None:
+        library = PackageLibrary(directory)
+        libraries[directory] = library
+    return library
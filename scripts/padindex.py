@@ -0,0 +1,254 @@
+import os
+import numpy as np
+import board
+import placement
+import reference
+
+# spatial index of the pads and components of a board placement script
+#
+# pads are the copper Place* records and components the PlaceInstance records;
+# a pad belongs to the component placed just before it in the script, and a
+# component's footprint is the box around its pads.  both are axis aligned
+# boxes, so distances are to the box and rounded corners count as square.
+#
+# a Grid buckets the boxes into square cells of about the size of a pad,
+# stored flat: the boxes of cell i are index[offsets[i]:offsets[i + 1]].
+# every query takes a whole batch and returns (query, box) pairs, found by
+# expanding each query into the cells it covers and those cells into their
+# boxes with a few numpy calls.
+#
+# the index is saved next to the script as <script>.padindex.npz together with
+# the hash of the script, and Load rebuilds it only when the script changed.
+
+class Grid:
+
+    def __init__(self, boxes, cell=None):
+        boxes = np.asarray(boxes, np.float64).reshape(-1, 4)
+        self.boxes = boxes
+        if cell is None:
+            sizes = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+            cell = 2 * float(np.median(sizes)) if len(boxes) else 1.0
+        self.cell = max(cell, 1e-3)
+        self.origin = boxes[:, :2].min(axis=0) if len(boxes) else np.zeros(2)
+        hi = boxes[:, 2:].max(axis=0) if len(boxes) else np.zeros(2)
+        self.columns, self.rows = (np.floor((hi - self.origin) / self.cell).astype(np.int64) + 1)
+        cell, box = self._Cells(boxes[:, :2], boxes[:, 2:])
+        order = np.argsort(cell, kind="stable")
+        self.index = box[order]
+        self.offsets = np.searchsorted(cell[order], np.arange(self.columns * self.rows + 1))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    # (cell, item) pairs for every cell a box from lo to hi covers
+    def _Cells(self, lo, hi):
+        c0 = np.clip(np.floor((lo - self.origin) / self.cell).astype(np.int64), 0, [self.columns - 1, self.rows - 1])
+        c1 = np.clip(np.floor((hi - self.origin) / self.cell).astype(np.int64), 0, [self.columns - 1, self.rows - 1])
+        # boxes completely off the grid cover no cells
+        outside = (hi < self.origin).any(axis=1) | (lo > self.origin + self.cell * np.array([self.columns, self.rows])).any(axis=1)
+        nx = np.where(outside, 0, c1[:, 0] - c0[:, 0] + 1)
+        ny = c1[:, 1] - c0[:, 1] + 1
+        item, local = Expand(nx * ny)
+        x = c0[item, 0] + local % nx[item]
+        y = c0[item, 1] + local // nx[item]
+        return y * self.columns + x, item
+
+    # (query, box) pairs of the boxes in the cells around each query window,
+    # each pair once
+    def Candidates(self, lo, hi):
+        cell, query = self._Cells(lo, hi)
+        start = self.offsets[cell]
+        pair, local = Expand(self.offsets[cell + 1] - start)
+        query = query[pair]
+        box = self.index[start[pair] + local]
+        if len(query):
+            unique = np.unique(query * len(self) + box)
+            query = unique // len(self)
+            box = unique % len(self)
+        return query, box
+
+    # distance from each query point to each box of its pairs
+    def Distance(self, points, query, box):
+        b = self.boxes[box]
+        p = points[query]
+        gap = np.maximum(np.maximum(b[:, :2] - p, p - b[:, 2:]), 0)
+        return np.sqrt((gap * gap).sum(axis=1))
+
+    # (query, box) pairs of the boxes overlapping query windows (x0, y0, x1, y1)
+    def Window(self, windows):
+        windows = np.asarray(windows, np.float64).reshape(-1, 4)
+        query, box = self.Candidates(windows[:, :2], windows[:, 2:])
+        b = self.boxes[box]
+        w = windows[query]
+        keep = (b[:, :2] <= w[:, 2:]).all(axis=1) & (b[:, 2:] >= w[:, :2]).all(axis=1)
+        return query[keep], box[keep]
+
+    # (query, box, distance) of the boxes within radius of query points
+    def Radius(self, points, radius):
+        points = np.asarray(points, np.float64).reshape(-1, 2)
+        radius = np.broadcast_to(np.asarray(radius, np.float64), (len(points),))
+        query, box = self.Candidates(points - radius[:, None], points + radius[:, None])
+        distance = self.Distance(points, query, box)
+        keep = distance <= radius[query]
+        return query[keep], box[keep], distance[keep]
+
+    # distances to and indices of the k nearest boxes of query points, sorted
+    # nearest first; inf and -1 where there are fewer than k boxes
+    #
+    # all queries start with a radius of one cell and the ones with fewer
+    # than k boxes within it are repeated with twice the radius; whatever is
+    # within the radius is all that can be nearer, so the k found are exact
+    def Nearest(self, points, k=1):
+        points = np.asarray(points, np.float64).reshape(-1, 2)
+        distances = np.full((len(points), k), np.inf)
+        indices = np.full((len(points), k), -1, np.int64)
+        pending = np.arange(len(points))
+        radius = np.full(len(points), self.cell)
+        # far enough from the grid to reach every box from any query
+        extent = np.hypot(self.columns, self.rows) * self.cell
+        limit = extent + np.sqrt(((points - self.origin) ** 2).sum(axis=1)) if len(points) else radius
+        while len(pending) and len(self):
+            query, box, distance = self.Radius(points[pending], radius[pending])
+            count = np.bincount(query, minlength=len(pending))
+            done = (count >= k) | (radius[pending] >= limit[pending])
+            keep = done[query]
+            query = query[keep]
+            order = np.lexsort((distance[keep], query))
+            query = query[order]
+            box = box[keep][order]
+            distance = distance[keep][order]
+            rank = np.arange(len(query)) - np.searchsorted(query, query)
+            first = rank < k
+            target = pending[query[first]]
+            distances[target, rank[first]] = distance[first]
+            indices[target, rank[first]] = box[first]
+            pending = pending[~done]
+            radius[pending] *= 2
+        return distances, indices
+
+# (item, position within the item) for items with the given counts
+def Expand(counts):
+    counts = np.asarray(counts, np.int64)
+    item = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return item, np.arange(len(item)) - starts[item]
+
+# box of a copper Place* record, None for other records and layers
+def PadBox(name, arguments):
+    if name in ["PlaceSmd", "PlacePad"]:
+        x, y, w, h, roundness, layer = arguments
+        box = (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+    elif name == "PlaceCircle":
+        x, y, radius, layer = arguments
+        box = (x - radius, y - radius, x + radius, y + radius)
+    elif name == "PlaceRing":
+        x, y, r0, r1, layer = arguments
+        box = (x - r1, y - r1, x + r1, y + r1)
+    elif name == "PlacePolygon":
+        points, layer = arguments[:2]
+        xs = [p[0] for p in points] + [p[i] for p in points if len(p) >= 9 for i in [3, 6]]
+        ys = [p[1] for p in points] + [p[i] for p in points if len(p) >= 9 for i in [4, 7]]
+        box = (min(xs), min(ys), max(xs), max(ys))
+    else:
+        return None
+    if layer not in board.LAYERS:
+        return None
+    return box, layer
+
+class PadIndex:
+
+    def __init__(self, pads, layers, components, names, placements, h=""):
+        self.pads = Grid(pads)
+        # eagle layer and component index of every pad, -1 for no component
+        self.layers = np.asarray(layers, np.int64)
+        self.components = np.asarray(components, np.int64)
+        self.names = list(names)
+        # x, y, mirror and rotate of every component
+        self.placements = np.asarray(placements, np.float64).reshape(-1, 4)
+        footprints = np.zeros((len(self.names), 4))
+        footprints[:, :2] = self.placements[:, :2]
+        footprints[:, 2:] = self.placements[:, :2]
+        owned = self.components >= 0
+        if owned.any():
+            np.minimum.at(footprints[:, :2], self.components[owned], self.pads.boxes[owned, :2])
+            np.maximum.at(footprints[:, 2:], self.components[owned], self.pads.boxes[owned, 2:])
+        self.footprints = Grid(footprints)
+        self.hash = h
+
+    # pairs of a query on one side of the board only, layer None for both
+    def Filter(self, pairs, layer):
+        if layer is None:
+            return pairs
+        keep = self.layers[pairs[1]] == layer
+        return tuple(x[keep] for x in pairs)
+
+    def PadsInWindow(self, windows, layer=None):
+        return self.Filter(self.pads.Window(windows), layer)
+
+    def PadsInRadius(self, points, radius, layer=None):
+        return self.Filter(self.pads.Radius(points, radius), layer)
+
+    def NearestPads(self, points, k=1):
+        return self.pads.Nearest(points, k)
+
+    def ComponentsInWindow(self, windows):
+        return self.footprints.Window(windows)
+
+    def ComponentsInRadius(self, points, radius):
+        return self.footprints.Radius(points, radius)
+
+    def NearestComponents(self, points, k=1):
+        return self.footprints.Nearest(points, k)
+
+    def Save(self, path):
+        np.savez(path, pads=self.pads.boxes, layers=self.layers, components=self.components,
+                 names=np.array(self.names, dtype=str), placements=self.placements, hash=np.array(self.hash))
+
+def Build(path):
+    pads = []
+    layers = []
+    components = []
+    names = []
+    placements = []
+    for number, name, arguments in placement.Records(path):
+        if name == "PlaceInstance":
+            names.append(arguments[0])
+            placements.append(arguments[1:5])
+            continue
+        pad = PadBox(name, arguments)
+        if pad is not None:
+            pads.append(pad[0])
+            layers.append(pad[1])
+            components.append(len(names) - 1)
+    return PadIndex(pads, layers, components, names, placements, reference.FileHash(path))
+
+def IndexPath(path):
+    return os.path.splitext(path)[0] + ".padindex.npz"
+
+def Read(path):
+    data = np.load(path)
+    return PadIndex(data["pads"], data["layers"], data["components"], [str(x) for x in data["names"]], data["placements"], str(data["hash"]))
+
+# the index of a placement script, read from its saved index when that was
+# made from the same script and built and saved otherwise
+def Load(path):
+    indexPath = IndexPath(path)
+    h = reference.FileHash(path)
+    if os.path.exists(indexPath):
+        index = Read(indexPath)
+        if index.hash == h:
+            return index
+    index = Build(path)
+    index.Save(indexPath)
+    return index
+
+if __name__ == '__main__':
+    import sys
+    path = sys.argv[1]
+    x, y, radius = [float(v) for v in sys.argv[2:5]]
+    index = Load(path)
+    query, pad, distance = index.PadsInRadius([(x, y)], radius)
+    for i, d in sorted(zip(pad, distance), key=lambda x: x[1]):
+        component = index.components[i]
+        name = index.names[component] if component >= 0 else "-"
+        print("%-20s layer %2d  %.3f mm  (%.3f, %.3f)" % (name, index.layers[i], d, (index.pads.boxes[i, 0] + index.pads.boxes[i, 2]) / 2, (index.pads.boxes[i, 1] + index.pads.boxes[i, 3]) / 2))
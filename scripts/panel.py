@@ -0,0 +1,72 @@
+import os
+import reference
+import stream
+
+# manufacturing panels of N x M boards
+#
+# the board is placed once from its placement script and turned into a block
+# definition; the package models are already block instances, so the board
+# block nests them.  the panel is then N x M instances of the board block plus
+# two rails along x, which costs the same whatever the panel size.
+
+# the block of the board; its description is the hash of the script it was
+# placed from, and the default name carries the hash too, so a changed script
+# gets a new block
+def BoardBlock(path, name=None):
+    import rhinoscriptsyntax as rs
+    h = reference.FileHash(path)
+    if name is None:
+        name = "board %s %s" % (os.path.splitext(os.path.basename(path))[0], h[:8])
+    if rs.IsBlock(name):
+        if rs.BlockDescription(name) != h:
+            raise ValueError("block " + name + " was placed from another version of " + os.path.basename(path))
+        return name
+    # a resumed placement already has the objects of the interrupted run
+    checkpoint = stream.Checkpoint(stream.CheckpointPath(path))
+    resumed = set(checkpoint.Ids()) if checkpoint.Resume(h) is not None else set()
+    before = set(str(x) for x in rs.AllObjects()) - resumed
+    stream.Place(path)
+    objects = [x for x in rs.AllObjects() if str(x) not in before]
+    rs.AddBlock(objects, (0, 0, 0), name, True)
+    rs.BlockDescription(name, h)
+    return name
+
+# place columns x rows instances of the board with spacing between boards and
+# rails of the given width above and below; returns the new objects
+def Panelize(path, columns, rows, spacing=2.0, rail=5.0, layer="panel"):
+    import rhinoscriptsyntax as rs
+    block = BoardBlock(path)
+    thickness = stream.Header(path).get("boardThickness", 1.6)
+    box = rs.BoundingBox(rs.BlockObjects(block))
+    x0 = box[0][0]
+    y0 = box[0][1]
+    width = box[6][0] - x0
+    height = box[6][1] - y0
+
+    rs.AddLayer(layer)
+    objects = []
+    for row in range(rows):
+        for column in range(columns):
+            x = column * (width + spacing)
+            y = row * (height + spacing)
+            objects.append(rs.InsertBlock(block, (x, y, 0)))
+
+    # rails run the full panel width just outside the first and last rows
+    xa = x0 - spacing
+    xb = x0 + columns * (width + spacing)
+    for ya, yb in [(y0 - spacing - rail, y0 - spacing), (y0 + rows * (height + spacing), y0 + rows * (height + spacing) + rail)]:
+        corners = [(xa, ya, -thickness), (xb, ya, -thickness), (xb, yb, -thickness), (xa, yb, -thickness),
+                   (xa, ya, 0), (xb, ya, 0), (xb, yb, 0), (xa, yb, 0)]
+        objects.append(rs.AddBox(corners))
+    rs.ObjectLayer(objects, layer)
+    return objects
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    path = rs.OpenFileName("Placement script", "Python scripts (*.py)|*.py||")
+    if path:
+        columns = rs.GetInteger("Columns", 3, 1)
+        rows = rs.GetInteger("Rows", 2, 1)
+        if columns and rows:
+            objects = Panelize(path, columns, rows)
+            print("panel of %d x %d boards" % (columns, rows))
@@ -0,0 +1,91 @@
+import ast
+import math
+import re
+
+# reader for the generated board placement scripts
+#
+# the scripts are a header of Place* helpers followed by one call per line:
+#
+#   PlaceInstance("C0201", 15.494000, 7.620000, False, 90.000000)
+#   PlaceSmd(15.494000, 7.400000, 0.300000, 0.210000, 0.000000, 1)
+#   curves.append(rs.AddArc3Pt((12.887300, 33.495000, 0), ...))
+#
+# records are (line number, call name, argument tuple) and are produced
+# lazily, a line at a time, without executing anything.
+#
+# an instance is placed with one transform: rotate about z, for the bottom
+# side flip over the y axis and drop by the board thickness, then move to
+# (x, y).  Transform composes that as a 4x4 matrix for one instance and
+# Transforms for all instances of a board at once with numpy.
+
+CALL = re.compile(r'^\s*(?:curves\.append\(rs\.)?(Place\w+|Add\w+)\((.*?)\)\)?\s*$')
+
+def ParseLine(line):
+    match = CALL.match(line)
+    if match is None:
+        return None
+    name, arguments = match.groups()
+    try:
+        arguments = ast.literal_eval("(" + arguments + ",)") if arguments.strip() else ()
+    except (ValueError, SyntaxError):
+        return None
+    return name, arguments
+
+def Records(path, start=0):
+    with open(path) as file:
+        for number, line in enumerate(file):
+            if number < start:
+                continue
+            # the helper definitions in the header are never bare calls
+            if line.startswith("def ") or line.startswith(" ") or line.startswith("\t"):
+                continue
+            record = ParseLine(line)
+            if record is not None:
+                yield (number,) + record
+
+# distinct package names in order of first placement
+def PackageNames(path):
+    names = []
+    seen = set()
+    for number, name, arguments in Records(path):
+        if name == "PlaceInstance" and arguments[0] not in seen:
+            seen.add(arguments[0])
+            names.append(arguments[0])
+    return names
+
+# 4x4 placement matrix, rows of 4 values
+def Transform(x, y, mirror, rotate, thickness):
+    angle = math.radians(rotate)
+    c = math.cos(angle)
+    s = math.sin(angle)
+    f = -1.0 if mirror else 1.0
+    return [
+        [f * c, -f * s, 0.0, x],
+        [s, c, 0.0, y],
+        [0.0, 0.0, f, -thickness if mirror else 0.0],
+        [0.0, 0.0, 0.0, 1.0],
+    ]
+
+# n x 4 x 4 placement matrices for sequences of x, y, mirror and rotate;
+# one Transform at a time where there is no numpy (IronPython)
+def Transforms(x, y, mirror, rotate, thickness):
+    try:
+        import numpy as np
+    except ImportError:
+        return [Transform(*(arguments + (thickness,))) for arguments in zip(x, y, mirror, rotate)]
+    angle = np.radians(np.asarray(rotate, dtype=float))
+    c = np.cos(angle)
+    s = np.sin(angle)
+    mirror = np.asarray(mirror, dtype=bool)
+    f = np.where(mirror, -1.0, 1.0)
+    matrices = np.zeros((len(angle), 4, 4))
+    matrices[:, 0, 0] = f * c
+    matrices[:, 0, 1] = -f * s
+    matrices[:, 0, 3] = x
+    matrices[:, 1, 0] = s
+    matrices[:, 1, 1] = c
+    matrices[:, 1, 3] = y
+    matrices[:, 2, 2] = f
+    matrices[:, 2, 3] = np.where(mirror, -thickness, 0.0)
+    matrices[:, 3, 3] = 1.0
+    return matrices
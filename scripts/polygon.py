@@ -0,0 +1,333 @@
+import math
+
+# triangulation of copper polygons with arcs and holes
+#
+# polygons come from the placement scripts as lists of corner records: a
+# record is (x, y, ...) and one of 9 or more values continues with an arc
+# through (r[6], r[7]) to (r[3], r[4]).  Discretize turns that into a plain
+# ring of points, Triangulate ear clips an outer ring with any number of holes
+# and Mesh extrudes many polygons into one closed mesh.
+#
+# the ear clipping works on a linked ring, outer ring counter clockwise and
+# holes clockwise.  each hole is first joined to the ring by a pair of bridge
+# edges from its rightmost vertex to a visible ring vertex, then ears are cut
+# until nothing is left.  only reflex vertices can make a convex corner fail
+# the ear test, and they are kept in a grid so the test reads the few cells
+# under the triangle instead of the whole ring.
+
+# largest distance between an arc and its chords
+TOLERANCE = 0.005
+
+def Circumcenter(a, b, c):
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    if abs(d) < 1e-12:
+        return None
+    aa = a[0] * a[0] + a[1] * a[1]
+    bb = b[0] * b[0] + b[1] * b[1]
+    cc = c[0] * c[0] + c[1] * c[1]
+    x = (aa * (b[1] - c[1]) + bb * (c[1] - a[1]) + cc * (a[1] - b[1])) / d
+    y = (aa * (c[0] - b[0]) + bb * (a[0] - c[0]) + cc * (b[0] - a[0])) / d
+    return x, y
+
+# points along the arc from a through m to b, without a, with b
+def Arc(a, m, b, tolerance=TOLERANCE):
+    center = Circumcenter(a, m, b)
+    if center is None:
+        return [b]
+    cx, cy = center
+    r = math.hypot(a[0] - cx, a[1] - cy)
+    a0 = math.atan2(a[1] - cy, a[0] - cx)
+    am = math.atan2(m[1] - cy, m[0] - cx)
+    a1 = math.atan2(b[1] - cy, b[0] - cx)
+    # counter clockwise, or clockwise when the middle is not on that side
+    sweep = (a1 - a0) % (2 * math.pi)
+    if (am - a0) % (2 * math.pi) > sweep:
+        sweep -= 2 * math.pi
+    step = 2 * math.acos(1 - tolerance / r) if r > tolerance else math.pi / 2
+    count = max(int(math.ceil(abs(sweep) / step)), 1)
+    points = []
+    for i in range(1, count):
+        t = a0 + sweep * i / count
+        points.append((cx + r * math.cos(t), cy + r * math.sin(t)))
+    points.append(b)
+    return points
+
+# ring of (x, y) points for a list of corner records
+def Discretize(records, tolerance=TOLERANCE):
+    points = []
+    for record in records:
+        p = (record[0], record[1])
+        if not points or p != points[-1]:
+            points.append(p)
+        if len(record) >= 9:
+            points.extend(Arc(p, (record[6], record[7]), (record[3], record[4]), tolerance))
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+def Area(ring):
+    area = 0.0
+    for i in range(len(ring)):
+        x0, y0 = ring[i - 1]
+        x1, y1 = ring[i]
+        area += x0 * y1 - x1 * y0
+    return area / 2.0
+
+def Cross(a, b, c):
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+# p inside or on counter clockwise triangle a, b, c
+def InTriangle(a, b, c, p):
+    return Cross(a, b, p) >= 0 and Cross(b, c, p) >= 0 and Cross(c, a, p) >= 0
+
+class Ring:
+
+    def __init__(self):
+        self.points = []
+        self.next = []
+        self.prev = []
+
+    # link a ring of points, returns the index of its first node
+    def Add(self, ring):
+        start = len(self.points)
+        n = len(ring)
+        self.points.extend(ring)
+        self.next.extend(start + (i + 1) % n for i in range(n))
+        self.prev.extend(start + (i - 1) % n for i in range(n))
+        return start
+
+    def Nodes(self, start):
+        i = start
+        while True:
+            yield i
+            i = self.next[i]
+            if i == start:
+                return
+
+    def Reflex(self, i):
+        return Cross(self.points[self.prev[i]], self.points[i], self.points[self.next[i]]) < 0
+
+    # visible vertex of the ring for the rightmost vertex m of a hole
+    def Visible(self, start, m):
+        mx, my = self.points[m]
+        a = (mx, my)
+        # nearest crossing of the ray from m in +x with a ring edge
+        crossing = None
+        candidate = None
+        for i in self.Nodes(start):
+            j = self.next[i]
+            (x0, y0), (x1, y1) = self.points[i], self.points[j]
+            if y0 == y1 or not (min(y0, y1) <= my <= max(y0, y1)):
+                continue
+            x = x0 + (my - y0) * (x1 - x0) / (y1 - y0)
+            if x >= mx and (crossing is None or x < crossing):
+                crossing = x
+                candidate = i if x0 > x1 else j
+        if candidate is None:
+            return None
+        if (crossing, my) == self.points[candidate]:
+            return self.Inside(start, candidate, a)
+        # a reflex vertex inside (m, crossing, candidate) hides the candidate;
+        # the one with the smallest angle to the ray is visible instead
+        b = (crossing, my)
+        c = self.points[candidate]
+        if Cross(a, b, c) < 0:
+            b, c = c, b
+        best = candidate
+        bestTangent = None
+        xa = min(a[0], b[0], c[0])
+        xb = max(a[0], b[0], c[0])
+        ya = min(a[1], b[1], c[1])
+        yb = max(a[1], b[1], c[1])
+        for i in self.Nodes(start):
+            p = self.points[i]
+            if not (xa <= p[0] <= xb and ya <= p[1] <= yb):
+                continue
+            if i == candidate or p == a or not InTriangle(a, b, c, p) or not self.Reflex(i):
+                continue
+            tangent = abs(p[1] - my) / max(p[0] - mx, 1e-12)
+            if bestTangent is None or tangent < bestTangent or (tangent == bestTangent and p[0] < self.points[best][0]):
+                best = i
+                bestTangent = tangent
+        return self.Inside(start, best, a)
+
+    # whether q is inside the corner of the ring at i
+    def Corner(self, i, q):
+        a = self.points[self.prev[i]]
+        b = self.points[i]
+        c = self.points[self.next[i]]
+        if Cross(a, b, c) >= 0:
+            return Cross(a, b, q) >= 0 and Cross(b, c, q) >= 0
+        return Cross(a, b, q) >= 0 or Cross(b, c, q) >= 0
+
+    # a bridge doubles its end vertices; of the nodes at the point of i, the
+    # one whose corner q is in, so the new bridge does not cross an old one
+    def Inside(self, start, i, q):
+        if self.Corner(i, q):
+            return i
+        for j in self.Nodes(start):
+            if self.points[j] == self.points[i] and self.Corner(j, q):
+                return j
+        return i
+
+    # splice the hole at m into the ring at p with a pair of bridge edges
+    def Join(self, p, m):
+        p2 = len(self.points)
+        m2 = p2 + 1
+        self.points.extend([self.points[p], self.points[m]])
+        self.next.extend([0, 0])
+        self.prev.extend([0, 0])
+        pn = self.next[p]
+        mp = self.prev[m]
+        self.next[p] = m
+        self.prev[m] = p
+        self.next[mp] = m2
+        self.prev[m2] = mp
+        self.next[m2] = p2
+        self.prev[p2] = m2
+        self.next[p2] = pn
+        self.prev[pn] = p2
+
+# triangles of an outer ring with holes, as index triples into the returned
+# point list
+def Triangulate(outer, holes=()):
+    if Area(outer) < 0:
+        outer = outer[::-1]
+    ring = Ring()
+    start = ring.Add(outer)
+    # rightmost holes first, so later bridges can use earlier ones
+    rings = []
+    for hole in holes:
+        if len(hole) < 3:
+            continue
+        if Area(hole) > 0:
+            hole = hole[::-1]
+        first = ring.Add(hole)
+        m = max(range(first, first + len(hole)), key=lambda i: ring.points[i])
+        rings.append(m)
+    rings.sort(key=lambda m: ring.points[m], reverse=True)
+    for m in rings:
+        p = ring.Visible(start, m)
+        if p is None:
+            raise ValueError("hole at (%g, %g) is not inside its polygon" % ring.points[m])
+        ring.Join(p, m)
+    return ring.points, Clip(ring, start)
+
+def Clip(ring, start):
+    points = ring.points
+    next = ring.next
+    prev = ring.prev
+    count = sum(1 for i in ring.Nodes(start))
+    triangles = []
+    if count < 3:
+        return triangles
+
+    # grid of reflex vertices, about one vertex per cell
+    nodes = list(ring.Nodes(start))
+    xs = [points[i][0] for i in nodes]
+    ys = [points[i][1] for i in nodes]
+    x0 = min(xs)
+    y0 = min(ys)
+    size = max(max(xs) - x0, max(ys) - y0) / max(math.sqrt(count), 1.0) or 1.0
+    grid = {}
+    for i in nodes:
+        if ring.Reflex(i):
+            key = (int((points[i][0] - x0) / size), int((points[i][1] - y0) / size))
+            grid.setdefault(key, []).append(i)
+    removed = set()
+
+    def Ear(i):
+        a = points[prev[i]]
+        b = points[i]
+        c = points[next[i]]
+        if Cross(a, b, c) <= 0:
+            return False
+        ca = int((min(a[0], b[0], c[0]) - x0) / size)
+        cb = int((max(a[0], b[0], c[0]) - x0) / size)
+        ra = int((min(a[1], b[1], c[1]) - y0) / size)
+        rb = int((max(a[1], b[1], c[1]) - y0) / size)
+        for gx in range(ca, cb + 1):
+            for gy in range(ra, rb + 1):
+                for j in grid.get((gx, gy), ()):
+                    if j in removed or j == i or j == prev[i] or j == next[i]:
+                        continue
+                    p = points[j]
+                    if p == a or p == b or p == c:
+                        continue
+                    if InTriangle(a, b, c, p) and ring.Reflex(j):
+                        return False
+        return True
+
+    i = start
+    stop = i
+    while count > 3:
+        a = prev[i]
+        c = next[i]
+        area = Cross(points[a], points[i], points[c])
+        if area == 0 or Ear(i):
+            if area != 0:
+                triangles.append((a, i, c))
+            next[a] = c
+            prev[c] = a
+            removed.add(i)
+            count -= 1
+            # a neighbour may turn reflex when a collinear vertex goes away
+            for j in [a, c]:
+                if ring.Reflex(j):
+                    key = (int((points[j][0] - x0) / size), int((points[j][1] - y0) / size))
+                    cell = grid.setdefault(key, [])
+                    if j not in cell:
+                        cell.append(j)
+            i = c
+            stop = c
+            continue
+        i = next[i]
+        if i == stop:
+            # no ear on a full pass, the ring is degenerate here; cut anyway
+            # so the rest still gets triangulated
+            a = prev[i]
+            c = next[i]
+            triangles.append((a, i, c))
+            next[a] = c
+            prev[c] = a
+            removed.add(i)
+            count -= 1
+            i = c
+            stop = c
+    a = prev[i]
+    c = next[i]
+    if Cross(points[a], points[i], points[c]) != 0:
+        triangles.append((a, i, c))
+    return triangles
+
+# one closed mesh of many polygons extruded from z0 to z1; polygons are
+# (outer, holes) with rings of (x, y) points
+def Mesh(polygons, z0, z1):
+    import Rhino
+    mesh = Rhino.Geometry.Mesh()
+    for outer, holes in polygons:
+        if Area(outer) < 0:
+            outer = outer[::-1]
+        holes = [h[::-1] if Area(h) > 0 else h for h in holes if len(h) >= 3]
+        points, triangles = Triangulate(outer, holes)
+        base = mesh.Vertices.Count
+        n = len(points)
+        for x, y in points:
+            mesh.Vertices.Add(x, y, z0)
+        for x, y in points:
+            mesh.Vertices.Add(x, y, z1)
+        for a, b, c in triangles:
+            mesh.Faces.AddFace(base + a, base + c, base + b)
+            mesh.Faces.AddFace(base + n + a, base + n + b, base + n + c)
+        # walls along each ring in its own direction face outward from the copper
+        offset = 0
+        for ring in [outer] + holes:
+            m = len(ring)
+            for i in range(m):
+                j = (i + 1) % m
+                mesh.Faces.AddFace(base + offset + i, base + offset + j, base + n + offset + j, base + n + offset + i)
+            offset += m
+    mesh.Vertices.CombineIdentical(True, True)
+    mesh.Normals.ComputeNormals()
+    mesh.Compact()
+    return mesh
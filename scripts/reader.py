@@ -0,0 +1,117 @@
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# reads the objects of a .3dm file in memory with Rhino.FileIO.File3dm
+#
+# nothing here touches the document, the command line or the selection, so
+# files can be read in a tight loop or on a background thread.  block
+# instances in the file are flattened into plain geometry.
+
+def Flatten(model, object, xform, results):
+    import Rhino
+    geometry = object.Geometry
+    if isinstance(geometry, Rhino.Geometry.InstanceReferenceGeometry):
+        definition = model.AllInstanceDefinitions.FindId(geometry.ParentIdefId)
+        if definition is None:
+            return
+        xform = xform * geometry.Xform
+        for id in definition.GetObjectIds():
+            member = model.Objects.FindId(id)
+            if member is not None:
+                Flatten(model, member, xform, results)
+        return
+    geometry = geometry.Duplicate()
+    if not xform.IsIdentity:
+        geometry.Transform(xform)
+    results.append((geometry, Color(model, object.Attributes)))
+
+# display color of an object in the file, layer indices do not carry over to
+# the document so layer colors are resolved here
+def Color(model, attributes):
+    import Rhino
+    if attributes.ColorSource == Rhino.DocObjects.ObjectColorSource.ColorFromObject:
+        return attributes.ObjectColor
+    layer = model.AllLayers.FindIndex(attributes.LayerIndex)
+    return layer.Color if layer is not None else None
+
+# (geometry, color) for every object in the file
+def ReadObjects(path):
+    import Rhino
+    model = Rhino.FileIO.File3dm.Read(path)
+    if model is None:
+        raise IOError("cannot read " + path)
+    results = []
+    for object in model.Objects:
+        if object.Attributes.IsInstanceDefinitionObject:
+            continue
+        Flatten(model, object, Rhino.Geometry.Transform.Identity, results)
+    model.Dispose()
+    return results
+
+def ReadGeometry(path):
+    return [geometry for geometry, color in ReadObjects(path)]
+
+def Attributes(color=None, layer=None):
+    import scriptcontext as sc
+    import Rhino
+    attributes = Rhino.DocObjects.ObjectAttributes()
+    if color is not None:
+        attributes.ColorSource = Rhino.DocObjects.ObjectColorSource.ColorFromObject
+        attributes.ObjectColor = color
+    if layer is not None:
+        attributes.LayerIndex = sc.doc.Layers.FindByFullPath(layer, -1)
+    return attributes
+
+# add (geometry, color) pairs to the document in one batch, returns the new ids
+def AddToDocument(objects, layer=None):
+    import scriptcontext as sc
+    ids = [sc.doc.Objects.Add(geometry.Duplicate(), Attributes(color, layer)) for geometry, color in objects]
+    sc.doc.Views.Redraw()
+    return ids
+
+# a read running on a background thread; Result() waits for it
+class PendingRead:
+
+    def __init__(self, path):
+        self.path = path
+        self.objects = None
+        self.error = None
+        self.done = threading.Event()
+
+    def Run(self):
+        try:
+            self.objects = ReadObjects(self.path)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+    def Result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.objects
+
+# read files on a small pool of daemon threads, in the order given
+def ReadInBackground(paths, threads=4):
+    pending = [PendingRead(path) for path in paths]
+    work = queue.Queue()
+    for read in pending:
+        work.put(read)
+
+    def Worker():
+        while True:
+            try:
+                read = work.get_nowait()
+            except queue.Empty:
+                return
+            read.Run()
+
+    for i in range(min(threads, len(pending))):
+        thread = threading.Thread(target=Worker)
+        thread.daemon = True
+        thread.start()
+    return pending
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import reader
+
+# reference geometry (usb-opening, usb-cap, ...) imported from .3dm files
+#
+# the geometry of each file is read in memory once per session and kept in
+# scriptcontext.sticky, keyed by the hash of the file contents; every use adds
+# fresh duplicates to the document.
+
+KEY = "firefly.reference"
+
+def FileHash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ReferenceCache:
+
+    def __init__(self):
+        self.objects = {}
+        self.hashes = {}
+
+    def Hash(self, path):
+        # rehash only when the file changes on disk
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+        h = self.hashes.get(key)
+        if h is None:
+            h = FileHash(path)
+            self.hashes[key] = h
+        return h
+
+    def Objects(self, path):
+        h = self.Hash(path)
+        objects = self.objects.get(h)
+        if objects is None:
+            objects = reader.ReadObjects(path)
+            self.objects[h] = objects
+        return objects
+
+    # add a fresh copy of the file geometry to the document, returns the ids
+    def Insert(self, path):
+        return reader.AddToDocument(self.Objects(path))
+
+    def Clear(self):
+        self.objects = {}
+        self.hashes = {}
+
+def Cache():
+    import scriptcontext as sc
+    cache = sc.sticky.get(KEY)
+    if cache is None:
+        cache = ReferenceCache()
+        sc.sticky[KEY] = cache
+    return cache
+
+def Insert(path):
+    return Cache().Insert(path)
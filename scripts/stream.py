@@ -0,0 +1,185 @@
+import json
+import os
+import reference
+import placement
+
+# streaming driver for the generated board placement scripts
+#
+# instead of running the whole script, only its header (imports and Place*
+# helpers) is run; the placement records are then read a line at a time and
+# applied in chunks.  undo recording and redraw are off while placing, so the
+# document keeps no history of the intermediate objects, and the only state
+# held in memory is the current chunk.
+#
+# after every chunk a line is appended to the checkpoint file with the offset
+# of the next record and the ids the chunk created.  a failed chunk deletes
+# what it created, so the document always matches the checkpoint; running
+# again with the same checkpoint resumes after the last complete chunk.
+#
+# checkpoint file, one json object per line:
+#   {"script": path, "hash": sha1 of the script}
+#   {"offset": line number of the next record, "ids": [...]}
+#   ...
+# chunks that add outline curves also carry "curves", all the outline curve
+# ids so far; the board is made from them after the last record.
+
+class Checkpoint:
+
+    def __init__(self, path):
+        self.path = path
+
+    def Exists(self):
+        return os.path.exists(self.path)
+
+    # (offset, outline curve ids) of the last complete chunk, or None when the
+    # checkpoint is for another script or its objects are gone
+    def Resume(self, h):
+        import rhinoscriptsyntax as rs
+        if not self.Exists():
+            return None
+        offset = 0
+        curves = []
+        with open(self.path) as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("hash") != h:
+                return None
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short by the interruption
+                    break
+                ids = entry.get("ids", []) + entry.get("curves", [])
+                if [x for x in ids if not rs.IsObject(x)]:
+                    return None
+                if "offset" in entry:
+                    offset = entry["offset"]
+                if "curves" in entry:
+                    curves = entry["curves"]
+        return offset, curves
+
+    # the ids recorded by the checkpoint, a line at a time
+    def Ids(self):
+        with open(self.path) as file:
+            file.readline()
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                for id in entry.get("ids", []) + entry.get("curves", []):
+                    yield id
+
+    def Start(self, script, h):
+        with open(self.path, "w") as file:
+            file.write(json.dumps({"script": script, "hash": h}) + "\n")
+
+    def Append(self, entry):
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def Remove(self):
+        if self.Exists():
+            os.remove(self.path)
+
+# ids in the result of a Place* or rs.Add* call
+def Ids(result):
+    if result is None:
+        return []
+    if isinstance(result, (list, tuple)):
+        return [x for r in result for x in Ids(r)]
+    return [str(result)]
+
+# run the lines of the script before its first record
+def Header(path):
+    lines = []
+    with open(path) as file:
+        for line in file:
+            if not line.startswith(" ") and not line.startswith("\t") and not line.startswith("def ") and placement.ParseLine(line):
+                break
+            lines.append(line)
+    namespace = {"__name__": "placement", "__file__": path}
+    exec(compile("".join(lines), path, "exec"), namespace)
+    return namespace
+
+def CheckpointPath(path):
+    return os.path.splitext(path)[0] + ".checkpoint"
+
+def Place(path, checkpointPath=None, chunk=1000):
+    import rhinoscriptsyntax as rs
+    import scriptcontext as sc
+    if checkpointPath is None:
+        checkpointPath = CheckpointPath(path)
+    checkpoint = Checkpoint(checkpointPath)
+    h = reference.FileHash(path)
+    resume = checkpoint.Resume(h)
+    if resume is None:
+        if checkpoint.Exists():
+            # left over from an older script or a closed document
+            rs.DeleteObjects([x for x in checkpoint.Ids() if rs.IsObject(x)])
+        checkpoint.Start(path, h)
+        offset, curves = 0, []
+    else:
+        offset, curves = resume
+
+    namespace = Header(path)
+    # scripts placing through a board.Board get the chunk's packages placed
+    # together, with all their transforms computed at once
+    board = namespace["Board"]() if "Board" in namespace else None
+    if not hasattr(board, "PlaceInstances"):
+        board = None
+    undo = sc.doc.UndoRecordingEnabled
+    sc.doc.UndoRecordingEnabled = False
+    rs.EnableRedraw(False)
+    placed = 0
+    try:
+        records = placement.Records(path, offset)
+        while True:
+            ids = []
+            added = []
+            instances = []
+            count = 0
+            try:
+                for number, name, arguments in records:
+                    if name.startswith("Add"):
+                        # outline curves, joined into the board at the end
+                        id = getattr(rs, name)(*arguments)
+                        added += Ids(id)
+                    elif name == "PlaceInstance" and board is not None:
+                        instances.append(arguments)
+                    else:
+                        ids += Ids(namespace[name](*arguments))
+                    count += 1
+                    offset = number + 1
+                    if count == chunk:
+                        break
+                ids += Ids(board.PlaceInstances(instances)) if instances else []
+            except:
+                # also on Escape, the chunk is all or nothing
+                rs.DeleteObjects([x for x in ids + added if rs.IsObject(x)])
+                raise
+            if not count:
+                break
+            placed += count
+            curves += added
+            entry = {"offset": offset, "ids": ids}
+            if added:
+                entry["curves"] = curves
+            checkpoint.Append(entry)
+            if count < chunk:
+                break
+        if curves:
+            namespace["PlacePCB"](curves)
+        checkpoint.Remove()
+    finally:
+        rs.EnableRedraw(True)
+        sc.doc.UndoRecordingEnabled = undo
+    return placed
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    path = rs.OpenFileName("Placement script", "Python scripts (*.py)|*.py||")
+    if path:
+        print("placed %d records" % Place(path))
@@ -0,0 +1,88 @@
+import mesh
+
+# shared tessellation of document objects at a few levels of detail
+#
+# meshes are generated on first request and cached by the content hash of the
+# geometry and the level name, so the viewers, analysis tools and exporters
+# all reuse the same mesh of the same brep.  the hash of an object is itself
+# memoized on the runtime serial number of the object, which changes whenever
+# the geometry in the document is replaced.
+
+LEVELS = {
+    "coarse": {"chord": 0.1, "angle": 20.0, "maximumEdge": 0.0},
+    "medium": {"chord": 0.02, "angle": 10.0, "maximumEdge": 0.0},
+    "fine": {"chord": 0.005, "angle": 5.0, "maximumEdge": 0.0},
+}
+
+class Tessellator:
+
+    def __init__(self, levels=None):
+        self.levels = dict((name, dict(tolerances)) for name, tolerances in LEVELS.items())
+        if levels:
+            for name, tolerances in levels.items():
+                self.Configure(name, **tolerances)
+        self.meshes = {}
+        self.hashes = {}
+
+    # set the chord and angle tolerances of a level, dropping any meshes made
+    # with the old ones
+    def Configure(self, level, chord=None, angle=None, maximumEdge=None):
+        tolerances = self.levels.setdefault(level, dict(LEVELS["medium"]))
+        if chord is not None:
+            tolerances["chord"] = chord
+        if angle is not None:
+            tolerances["angle"] = angle
+        if maximumEdge is not None:
+            tolerances["maximumEdge"] = maximumEdge
+        for key in [key for key in self.meshes if key[1] == level]:
+            del self.meshes[key]
+
+    def Parameters(self, level):
+        tolerances = self.levels[level]
+        return mesh.MeshingParameters(tolerances["chord"], tolerances["angle"], tolerances["maximumEdge"])
+
+    def Hash(self, object):
+        import rhinoscriptsyntax as rs
+        serial = rs.coercerhinoobject(object).RuntimeSerialNumber
+        h = self.hashes.get(serial)
+        if h is None:
+            h = mesh.GeometryHash(object)
+            self.hashes[serial] = h
+        return h
+
+    def Mesh(self, object, level="medium"):
+        key = (self.Hash(object), level)
+        result = self.meshes.get(key)
+        if result is None:
+            result = mesh.FromObject(object, self.Parameters(level))
+            self.meshes[key] = result
+        return result
+
+    def Combined(self, objects, level="medium"):
+        return mesh.Combine([self.Mesh(x, level) for x in objects])
+
+    def Layer(self, layer, level="medium"):
+        import rhinoscriptsyntax as rs
+        return self.Combined([x for x in (rs.ObjectsByLayer(layer) or []) if mesh.IsSolid(x)], level)
+
+    def Clear(self):
+        self.meshes = {}
+        self.hashes = {}
+
+# one tessellator for the session, modules stay loaded between script runs
+tessellator = Tessellator()
+
+def Mesh(object, level="medium"):
+    return tessellator.Mesh(object, level)
+
+def Combined(objects, level="medium"):
+    return tessellator.Combined(objects, level)
+
+def Tolerances(level):
+    return dict(tessellator.levels[level])
+
+def Layer(layer, level="medium"):
+    return tessellator.Layer(layer, level)
+
+def Hash(object):
+    return tessellator.Hash(object)
@@ -0,0 +1,121 @@
+import numpy as np
+import mesh
+import tessellation
+from bvh import BVH
+
+# minimum wall thickness of a closed part
+#
+# points are sampled over the surface and a ray is cast inward along the
+# negated surface normal of each; the distance to the first wall hit is the
+# local thickness.  all rays go through the BVH as one batch.
+
+class ThicknessResult:
+
+    def __init__(self, points, normals, thickness, threshold, spacing):
+        self.points = points
+        self.normals = normals
+        self.thickness = thickness
+        self.threshold = threshold
+        self.spacing = spacing
+
+    def Minimum(self):
+        finite = self.thickness[np.isfinite(self.thickness)]
+        return finite.min() if len(finite) else np.inf
+
+    def Thin(self):
+        return self.thickness < self.threshold
+
+    # connected clusters of thin samples, thinnest first
+    def Regions(self, cellSize=None):
+        if cellSize is None:
+            cellSize = 2 * self.spacing
+        thin = np.nonzero(self.Thin())[0]
+        if not len(thin):
+            return []
+        cells = np.floor(self.points[thin] / cellSize).astype(np.int64)
+        keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        lookup = dict((tuple(key), i) for i, key in enumerate(keys))
+        parent = list(range(len(keys)))
+
+        def Find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        offsets = [(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1)]
+        for i, key in enumerate(keys):
+            for offset in offsets:
+                j = lookup.get((key[0] + offset[0], key[1] + offset[1], key[2] + offset[2]))
+                if j is not None:
+                    parent[Find(i)] = Find(j)
+        labels = np.array([Find(i) for i in range(len(keys))])[inverse]
+
+        regions = []
+        for label in np.unique(labels):
+            members = thin[labels == label]
+            points = self.points[members]
+            thickness = self.thickness[members]
+            thinnest = members[np.argmin(thickness)]
+            regions.append({
+                "count": len(members),
+                "minimum": float(thickness.min()),
+                "mean": float(thickness.mean()),
+                "location": self.points[thinnest].tolist(),
+                "min": points.min(axis=0).tolist(),
+                "max": points.max(axis=0).tolist(),
+            })
+        regions.sort(key=lambda region: region["minimum"])
+        return regions
+
+    def Summary(self):
+        finite = self.thickness[np.isfinite(self.thickness)]
+        return {
+            "samples": len(self.thickness),
+            "minimum": float(self.Minimum()),
+            "mean": float(finite.mean()) if len(finite) else None,
+            "threshold": self.threshold,
+            "thin": int(self.Thin().sum()),
+            "regions": self.Regions(),
+        }
+
+def Analyze(vertices, faces, samples=20000, threshold=0.8, seed=0, bvh=None):
+    if bvh is None:
+        bvh = BVH(vertices, faces)
+    points, normals, triangles = mesh.SampleSurface(vertices, faces, samples, seed)
+    # start just inside the surface so the ray does not hit its own triangle
+    epsilon = 1e-5
+    thickness, hit = bvh.Raycast(points - normals * epsilon, -normals, 1e-6)
+    thickness[np.isfinite(thickness)] += epsilon
+    spacing = np.sqrt(mesh.SurfaceArea(vertices, faces) / max(samples, 1))
+    return ThicknessResult(points, normals, thickness, threshold, spacing)
+
+def AnalyzeLayer(layer, samples=20000, threshold=0.8, seed=0, level="medium"):
+    vertices, faces = tessellation.Layer(layer, level)
+    return Analyze(vertices, faces, samples, threshold, seed)
+
+# add the thin samples as a red point cloud and a dot at each region
+def Show(result, layer="thickness"):
+    import rhinoscriptsyntax as rs
+    rs.AddLayer(layer, 0x0000ff)
+    thin = result.Thin()
+    if not thin.any():
+        return []
+    objects = []
+    cloud = rs.AddPointCloud([tuple(p) for p in result.points[thin]])
+    objects.append(cloud)
+    for region in result.Regions():
+        objects.append(rs.AddTextDot("%.2f" % region["minimum"], region["location"]))
+    rs.ObjectLayer(objects, layer)
+    rs.ObjectColor(cloud, (255, 0, 0))
+    return objects
+
+if __name__ == '__main__':
+    import rhinoscriptsyntax as rs
+    for name in ["top", "spacer", "shell", "back", "clip"]:
+        if not rs.IsLayer(name) or not rs.ObjectsByLayer(name):
+            continue
+        result = AnalyzeLayer(name)
+        print("%s: minimum thickness %.3f mm, %d thin samples in %d regions" % (name, result.Minimum(), result.Thin().sum(), len(result.Regions())))
+        Show(result, name + " thickness")
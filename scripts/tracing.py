@@ -0,0 +1,138 @@
+import json
+import os
+import time
+
+# chrome trace event files of FireflyIceBlue builds
+#
+# a Trace is a build listener: every part and every named step inside a part
+# becomes a span, and Instrument() adds a span for each call of the Create*
+# helper methods.  the part methods themselves are left alone, their part's
+# span already covers them and ends after their last step.  each span start and
+# end also records the number of document objects and the memory of the process
+# as counters.  the file opens in chrome://tracing or https://ui.perfetto.dev,
+# where a slow step of a part shows up as the wide bar under it.
+
+# methods that are not a piece of geometry
+SKIP = ["Create", "CreatePart", "CreateLayer"]
+
+# bytes of memory in use by the process, None where it cannot be read
+def Memory():
+    try:
+        import System
+        return System.Diagnostics.Process.GetCurrentProcess().WorkingSet64
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return None
+
+def Objects():
+    try:
+        import scriptcontext as sc
+        return sc.doc.Objects.Count
+    except (ImportError, AttributeError):
+        return None
+
+class Trace:
+
+    def __init__(self):
+        self.events = []
+        self.start = time.time()
+        self.pid = os.getpid()
+        self.originals = {}
+
+    def Time(self):
+        return int((time.time() - self.start) * 1000000)
+
+    def Counters(self, ts):
+        counters = {}
+        objects = Objects()
+        if objects is not None:
+            counters["objects"] = objects
+        memory = Memory()
+        if memory is not None:
+            counters["memory MB"] = round(memory / 1048576.0, 1)
+        if counters:
+            self.events.append({"name": "document", "ph": "C", "ts": ts, "pid": self.pid, "tid": 0, "args": counters})
+        return counters
+
+    def Begin(self, name, category):
+        ts = self.Time()
+        self.events.append({"name": name, "cat": category, "ph": "B", "ts": ts, "pid": self.pid, "tid": 0, "args": self.Counters(ts)})
+
+    def End(self, name, category):
+        ts = self.Time()
+        self.events.append({"name": name, "cat": category, "ph": "E", "ts": ts, "pid": self.pid, "tid": 0, "args": self.Counters(ts)})
+
+    def BeginStage(self, name):
+        self.Begin(name, "stage")
+
+    def EndStage(self, name, result=None):
+        self.End(name, "stage")
+
+    # a span around every call of the Create* helpers of the build object
+    def Instrument(self, fireflyIceBlue):
+        parts = [method for attribute, method in fireflyIceBlue.PARTS.values()]
+        for name in dir(type(fireflyIceBlue)):
+            if name.startswith("Create") and name not in SKIP + parts and callable(getattr(fireflyIceBlue, name)):
+                self.originals[name] = getattr(fireflyIceBlue, name)
+                setattr(fireflyIceBlue, name, self.Wrap(name, self.originals[name]))
+
+    def Uninstrument(self, fireflyIceBlue):
+        for name in self.originals:
+            delattr(fireflyIceBlue, name)
+        self.originals = {}
+
+    def Wrap(self, name, method):
+        trace = self
+
+        def Call(*args, **kwargs):
+            trace.Begin(name, "method")
+            try:
+                return method(*args, **kwargs)
+            finally:
+                trace.End(name, "method")
+
+        return Call
+
+    # total seconds of each span name, slowest first
+    def Summary(self):
+        totals = {}
+        spans = []
+        for event in self.events:
+            if event["ph"] == "B":
+                spans.append(event)
+            elif event["ph"] == "E":
+                begin = spans.pop()
+                totals[begin["name"]] = totals.get(begin["name"], 0) + (event["ts"] - begin["ts"]) / 1000000.0
+        return sorted(totals.items(), key=lambda x: -x[1])
+
+    def Write(self, path):
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+# build the enclosure parts with a trace of every stage and helper call
+def TraceBuild(fireflyIceBlue, parts=None):
+    trace = Trace()
+    fireflyIceBlue.listeners.append(trace)
+    trace.Instrument(fireflyIceBlue)
+    try:
+        fireflyIceBlue.Create(parts)
+    finally:
+        trace.Uninstrument(fireflyIceBlue)
+        fireflyIceBlue.listeners.remove(trace)
+    return trace
+
+if __name__ == '__main__':
+    import loader
+    root = os.path.dirname(os.path.abspath(__file__))
+    fireflyIceBlue = loader.FireflyIceBlue()()
+    fireflyIceBlue.root = root + os.sep
+    trace = TraceBuild(fireflyIceBlue)
+    path = os.path.join(root, "build-trace.json")
+    trace.Write(path)
+    for name, seconds in trace.Summary()[:10]:
+        print("%-24s %8.2f s" % (name, seconds))
+    print("wrote " + path)
@@ -0,0 +1,75 @@
+import numpy as np
+import bvh
+
+def Soup(seed, count=400):
+    random = np.random.default_rng(seed)
+    centers = random.random((count, 3)) * 10
+    vertices = (centers[:, None] + random.normal(0, 0.4, (count, 3, 3))).reshape(-1, 3)
+    return vertices, np.arange(3 * count).reshape(-1, 3)
+
+# nearest hit of every ray on every triangle, Moller-Trumbore
+def BruteRaycast(vertices, faces, origins, directions, tMin=1e-6):
+    v0, v1, v2 = [vertices[faces[:, i]][None] for i in range(3)]
+    e1 = v1 - v0
+    e2 = v2 - v0
+    d = directions[:, None]
+    p = np.cross(d, e2)
+    det = (e1 * p).sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = origins[:, None] - v0
+        u = (s * p).sum(axis=2) / det
+        q = np.cross(s, e1)
+        v = (d * q).sum(axis=2) / det
+        t = (e2 * q).sum(axis=2) / det
+    valid = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > tMin)
+    t = np.where(valid, t, np.inf)
+    return t.min(axis=1), np.where(np.isfinite(t.min(axis=1)), t.argmin(axis=1), -1)
+
+def test_raycast():
+    vertices, faces = Soup(1)
+    random = np.random.default_rng(2)
+    origins = random.random((300, 3)) * 10
+    directions = random.normal(size=(300, 3))
+    t, hit = bvh.BVH(vertices, faces).Raycast(origins, directions)
+    expected, expectedHit = BruteRaycast(vertices, faces, origins, directions)
+    assert np.allclose(t, expected)
+    assert (hit == expectedHit).all()
+    assert (hit >= 0).sum() > 20
+
+def test_nearest():
+    vertices, faces = Soup(3)
+    points = np.random.default_rng(4).random((200, 3)) * 12 - 1
+    distance, hit, closest = bvh.BVH(vertices, faces).Nearest(points)
+    v0 = vertices[faces[:, 0]][None]
+    c = bvh.ClosestPointOnTriangles(points[:, None], v0, vertices[faces[:, 1]][None] - v0, vertices[faces[:, 2]][None] - v0)
+    d = np.sqrt(((c - points[:, None]) ** 2).sum(axis=2))
+    assert np.allclose(distance, d.min(axis=1))
+    assert np.allclose(np.sqrt(((closest - points) ** 2).sum(axis=1)), distance)
+
+def test_nearest_within_distance():
+    vertices, faces = Soup(5)
+    points = np.random.default_rng(6).random((200, 3)) * 14 - 2
+    tree = bvh.BVH(vertices, faces)
+    distance, hit, closest = tree.Nearest(points)
+    near, nearHit, nearClosest = tree.Nearest(points, 0.3)
+    inside = distance <= 0.3
+    assert np.allclose(near[inside], distance[inside])
+    assert (nearHit[~inside] == -1).all()
+
+# every pair of triangles with overlapping boxes is a candidate
+def test_overlaps():
+    a, fa = Soup(7, 200)
+    b, fb = Soup(8, 200)
+    margin = 0.1
+    pairsA, pairsB = bvh.BVH(a, fa).Overlaps(bvh.BVH(b, fb), margin)
+    found = set(zip(pairsA.tolist(), pairsB.tolist()))
+    ta = a[fa]
+    tb = b[fb]
+    loA = ta.min(axis=1)[:, None] - margin
+    hiA = ta.max(axis=1)[:, None] + margin
+    loB = tb.min(axis=1)[None]
+    hiB = tb.max(axis=1)[None]
+    overlapping = ((loA <= hiB) & (loB <= hiA)).all(axis=2)
+    expected = set(zip(*[x.tolist() for x in np.nonzero(overlapping)]))
+    assert expected
+    assert expected <= found
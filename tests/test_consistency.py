@@ -0,0 +1,26 @@
+import loader
+import consistency
+
+def Core():
+    return loader.FireflyIceBlue()()
+
+def test_bundled_board_matches():
+    fireflyIceBlue = Core()
+    assert consistency.Check(fireflyIceBlue, loader.ScriptPath(fireflyIceBlue.pcbPath)) == []
+
+def test_mismatches():
+    fireflyIceBlue = Core()
+    path = loader.ScriptPath(fireflyIceBlue.pcbPath)
+    fireflyIceBlue.usbPcbEdge += 1.0
+    fireflyIceBlue.pcbRadius += 0.5
+    fireflyIceBlue.postPoints = [(x + 1.0, y) for x, y in fireflyIceBlue.postPoints[:1]] + list(fireflyIceBlue.postPoints[1:])
+    problems = " ".join(consistency.Check(fireflyIceBlue, path))
+    assert "usbPcbEdge" in problems
+    assert "pcbRadius" in problems
+    assert "has no mount hole" in problems
+    assert "has no post" in problems
+
+def test_circle():
+    center, radius = consistency.Circle((1, 0), (0, 1), (-1, 0))
+    assert abs(center[0]) < 1e-12 and abs(center[1]) < 1e-12 and abs(radius - 1) < 1e-12
+    assert consistency.Circle((0, 0), (1, 1), (2, 2)) is None
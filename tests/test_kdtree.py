@@ -0,0 +1,43 @@
+import numpy as np
+import kdtree
+
+def Brute(points, queries):
+    d = np.sqrt(((queries[:, None] - points[None]) ** 2).sum(axis=2))
+    return d.min(axis=1), d.argmin(axis=1)
+
+def test_query():
+    random = np.random.default_rng(1)
+    points = random.random((3000, 3)) * [40, 35, 8]
+    queries = random.random((400, 3)) * [44, 39, 10] - 2
+    distance, index = kdtree.KDTree(points).Query(queries)
+    expected, expectedIndex = Brute(points, queries)
+    assert np.allclose(distance, expected)
+    assert (index == expectedIndex).all()
+
+def test_maximum_distance():
+    random = np.random.default_rng(2)
+    points = random.random((2000, 3))
+    queries = random.random((300, 3))
+    distance, index = kdtree.KDTree(points).Query(queries, 0.02)
+    expected, expectedIndex = Brute(points, queries)
+    near = expected <= 0.02
+    assert near.any() and not near.all()
+    assert np.allclose(distance[near], expected[near])
+    assert (index[near] == expectedIndex[near]).all()
+    assert (index[~near] == -1).all()
+
+# duplicates and points on a plane, as on the flat faces of a part
+def test_degenerate():
+    random = np.random.default_rng(3)
+    points = np.zeros((1000, 3))
+    points[:, :2] = np.round(random.random((1000, 2)) * 10)
+    queries = random.random((200, 3)) * 10
+    distance, index = kdtree.KDTree(points).Query(queries)
+    expected, expectedIndex = Brute(points, queries)
+    assert np.allclose(distance, expected)
+    assert np.allclose(np.sqrt(((points[index] - queries) ** 2).sum(axis=1)), expected)
+
+def test_empty():
+    distance, index = kdtree.KDTree(np.zeros((0, 3))).Query(np.zeros((2, 3)))
+    assert np.isinf(distance).all()
+    assert (index == -1).all()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import numpy as np
+import padindex
+import placement
+
+def Boxes(seed, count=500):
+    random = np.random.default_rng(seed)
+    lo = random.random((count, 2)) * 30
+    return np.hstack([lo, lo + random.random((count, 2)) * 1.5 + 0.1])
+
+def BruteDistance(boxes, points):
+    gap = np.maximum(np.maximum(boxes[None, :, :2] - points[:, None], points[:, None] - boxes[None, :, 2:]), 0)
+    return np.sqrt((gap * gap).sum(axis=2))
+
+def Pairs(query, box):
+    return set(zip(query.tolist(), box.tolist()))
+
+def test_window():
+    boxes = Boxes(1)
+    random = np.random.default_rng(2)
+    lo = random.random((100, 2)) * 32 - 1
+    windows = np.hstack([lo, lo + random.random((100, 2)) * 4])
+    query, box = padindex.Grid(boxes).Window(windows)
+    overlapping = (boxes[None, :, :2] <= windows[:, None, 2:]).all(axis=2) & (boxes[None, :, 2:] >= windows[:, None, :2]).all(axis=2)
+    assert Pairs(query, box) == set(zip(*[x.tolist() for x in np.nonzero(overlapping)]))
+
+def test_radius():
+    boxes = Boxes(3)
+    points = np.random.default_rng(4).random((100, 2)) * 34 - 2
+    query, box, distance = padindex.Grid(boxes).Radius(points, 1.0)
+    d = BruteDistance(boxes, points)
+    assert Pairs(query, box) == set(zip(*[x.tolist() for x in np.nonzero(d <= 1.0)]))
+    assert np.allclose(distance, d[query, box])
+
+def test_nearest():
+    boxes = Boxes(5)
+    # some queries far off the grid
+    points = np.random.default_rng(6).random((200, 2)) * 80 - 25
+    distances, indices = padindex.Grid(boxes).Nearest(points, 3)
+    d = BruteDistance(boxes, points)
+    assert np.allclose(distances, np.sort(d, axis=1)[:, :3])
+    assert np.allclose(d[np.arange(len(points))[:, None], indices], distances)
+
+def test_nearest_more_than_boxes():
+    distances, indices = padindex.Grid(Boxes(7, 2)).Nearest([(0, 0)], 3)
+    assert np.isinf(distances[0, 2]) and indices[0, 2] == -1
+    assert (indices[0, :2] >= 0).all()
+
+def test_board(tmp_path):
+    path = str(tmp_path / "pcb.py")
+    shutil.copy(os.path.join(os.path.dirname(padindex.__file__), "firefly-ice-blue-pcb.py"), path)
+    index = padindex.Load(path)
+    instances = [x for x in placement.Records(path) if x[1] == "PlaceInstance"]
+    assert len(index.names) == len(instances)
+    assert len(index.pads) > 0
+    assert os.path.exists(padindex.IndexPath(path))
+    assert padindex.Load(path).hash == index.hash
+    # every pad is in the footprint of its component
+    owned = index.components >= 0
+    footprints = index.footprints.boxes[index.components[owned]]
+    pads = index.pads.boxes[owned]
+    assert (footprints[:, :2] <= pads[:, :2]).all() and (footprints[:, 2:] >= pads[:, 2:]).all()
@@ -0,0 +1,21 @@
+import numpy as np
+import placement
+
+def Apply(matrix, point):
+    return np.dot(np.asarray(matrix), list(point) + [1.0])[:3]
+
+def test_transform():
+    assert np.allclose(Apply(placement.Transform(5, 6, False, 90, 1.6), (1, 0, 0.5)), (5, 7, 0.5))
+    # mirrored packages are flipped onto the bottom of the board
+    assert np.allclose(Apply(placement.Transform(5, 6, True, 0, 1.6), (1, 0, 0.5)), (4, 6, -2.1))
+    assert np.allclose(Apply(placement.Transform(5, 6, True, 90, 1.6), (1, 0, 0)), (5, 7, -1.6))
+
+def test_transforms():
+    random = np.random.default_rng(1)
+    x = random.random(50) * 30
+    y = random.random(50) * 30
+    mirror = random.random(50) < 0.5
+    rotate = random.choice([0.0, 45.0, 90.0, 180.0, 270.0, 33.3], 50)
+    matrices = placement.Transforms(x, y, mirror, rotate, 1.6)
+    for i in range(50):
+        assert np.allclose(matrices[i], placement.Transform(x[i], y[i], mirror[i], rotate[i], 1.6))
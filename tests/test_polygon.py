@@ -0,0 +1,48 @@
+import math
+import pytest
+import polygon
+
+def TriangleArea(points, triangles):
+    return sum(polygon.Cross(points[a], points[b], points[c]) / 2.0 for a, b, c in triangles)
+
+def Square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+def test_square_with_holes():
+    outer = Square(0, 0, 10)
+    holes = [Square(1, 1, 2), Square(6, 2, 3), Square(2, 6, 1)[::-1]]
+    points, triangles = polygon.Triangulate(outer, holes)
+    assert TriangleArea(points, triangles) == pytest.approx(100 - 4 - 9 - 1)
+    assert all(polygon.Cross(points[a], points[b], points[c]) > 0 for a, b, c in triangles)
+
+def test_concave_ring():
+    comb = [(0, 0), (20, 0), (20, 5)]
+    for i in range(10):
+        comb += [(19 - 2 * i, 5), (19 - 2 * i, 1), (18 - 2 * i, 1), (18 - 2 * i, 5)]
+    comb.append((0, 5))
+    points, triangles = polygon.Triangulate(comb)
+    assert TriangleArea(points, triangles) == pytest.approx(polygon.Area(comb))
+
+def test_arcs():
+    # a disc of radius 5 from two half circle arcs, with a round hole
+    disc = [(5, 0, 0, -5, 0, 0, 0, 5, 0), (-5, 0, 0, 5, 0, 0, 0, -5, 0)]
+    hole = [(1, 0, 0, -1, 0, 0, 0, 1, 0), (-1, 0, 0, 1, 0, 0, 0, -1, 0)]
+    outer = polygon.Discretize(disc)
+    inner = polygon.Discretize(hole)
+    points, triangles = polygon.Triangulate(outer, [inner])
+    area = TriangleArea(points, triangles)
+    assert area == pytest.approx(polygon.Area(outer) - abs(polygon.Area(inner)))
+    # the chords cut off at most TOLERANCE along each circle
+    assert area == pytest.approx(math.pi * 24, abs=polygon.TOLERANCE * 2 * math.pi * 6)
+
+# staggered holes, whose bridges run into the bridges of earlier holes
+def test_many_holes():
+    outer = Square(0, 0, 40)
+    holes = [Square(2 + 4 * i + (j % 2), 2 + 4 * j, 2) for i in range(9) for j in range(9)]
+    points, triangles = polygon.Triangulate(outer, holes)
+    assert TriangleArea(points, triangles) == pytest.approx(1600 - 4 * len(holes))
+    assert all(polygon.Cross(points[a], points[b], points[c]) > 0 for a, b, c in triangles)
+
+def test_hole_outside():
+    with pytest.raises(ValueError):
+        polygon.Triangulate(Square(0, 0, 1), [Square(5, 5, 1)])